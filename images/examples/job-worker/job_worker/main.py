@@ -39,14 +39,14 @@ def main() -> int:
 
     s = store.Client()
 
-    frame = s.get_frame(job.info.trigger.object)
-    frame *= 2
-
     object_scaled = job.info.trigger.object.replace(
         "measurements", "measurements_processed"
     )
 
-    s.put_frame(object_scaled, frame)
+    # Process the frame in chunks to limit the memory usage for large objects
+    chunks = s.get_frame_chunks(job.info.trigger.object)
+
+    s.put_frame_chunks(object_scaled, (chunk * 2 for chunk in chunks))
 
     return 0
 
@@ -8,8 +8,10 @@ import environ
 import logging
 from functools import partial
 
+import numpy as np
+
 from seguro.common import broker, config
-from villas.node.sample import Sample
+from seguro.common.broker import SampleBlock
 
 env = environ.Env()
 
@@ -23,14 +25,12 @@ VALUES = env.int("VALUES", 6)
 BLOCK_INTERVAL = env.str("BLOCK_INTERVAL", "1m")
 
 
-def new_samples(args, b: broker.Client, topic: str, samples: list[Sample]):
-    for sample in samples:
-        print(topic, sample)
+def new_samples(args, b: broker.Client, topic: str, block: SampleBlock):
+    print(topic, block.values)
 
-        for i, _ in enumerate(sample.data):
-            sample.data[i] *= i
+    block.values *= np.arange(block.values.shape[1])
 
-    b.publish_samples(args.topic_processed, samples)
+    b.publish_block(args.topic_processed, block)
 
 
 def main() -> int:
@@ -58,7 +58,10 @@ def main() -> int:
 
     b = broker.Client("example-streaming-worker")
 
-    b.subscribe_samples(args.topic, partial(new_samples, args))
+    # Replicas of a scaled job split the samples between them
+    b.subscribe_blocks(
+        args.topic, partial(new_samples, args), group=broker.job_group()
+    )
 
     while True:
         try:
@@ -0,0 +1,76 @@
+#!/bin/env python
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+# Measures the message throughput through broker.Client at each QoS level.
+#
+# Run against the Mosquitto instance of the local Docker Compose stack:
+#   docker compose up --detach mosquitto
+#   poetry run python scripts/benchmark-broker.py --count 10000 --size 256
+
+import os
+import time
+import argparse
+import threading
+
+from seguro.common import broker
+
+
+def benchmark(args: argparse.Namespace, qos: int):
+    payload = os.urandom(args.size)
+    topic = f"{args.topic}/{qos}"
+
+    received = 0
+    done = threading.Event()
+
+    def callback(b: broker.Client, msg: broker.Message):
+        nonlocal received
+
+        received += 1
+        if received == args.count:
+            done.set()
+
+    sub = broker.Client("benchmark", qos=qos, max_inflight=args.max_inflight)
+    pub = broker.Client("benchmark", qos=qos, max_inflight=args.max_inflight)
+
+    sub.subscribe(topic, callback)
+    time.sleep(1)
+
+    start = time.perf_counter()
+
+    for _ in range(args.count):
+        pub.publish(topic, payload)
+
+    done.wait(args.timeout)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"qos={qos}: n={args.count} received={received} "
+        f"elapsed={elapsed:.2f}s "
+        f"rate={received / elapsed:.0f}msg/s "
+        f"throughput={received * args.size / elapsed / 1e6:.2f}MB/s"
+    )
+
+    for c in [pub, sub]:
+        c.client.disconnect()
+        c.stop_listening()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    parser.add_argument("-s", "--size", type=int, default=256)
+    parser.add_argument("-t", "--topic", type=str, default="benchmark")
+    parser.add_argument("-q", "--qos", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("-i", "--max-inflight", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60)
+
+    args = parser.parse_args()
+
+    for qos in args.qos:
+        benchmark(args, qos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/bin/env python
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+# Measures the time to find the callbacks of a message topic with many
+# subscriptions. Compares broker.TopicRouter to the topic matcher of paho
+# and to a linear scan over all filters.
+#
+# No broker is required:
+#   poetry run python scripts/benchmark-router.py --filters 10000
+
+import time
+import random
+import argparse
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.matcher import MQTTMatcher
+
+from seguro.common.broker import TopicRouter
+
+
+def report(name: str, elapsed: float, count: int):
+    print(f"{name}: n={count} per_match={elapsed / count * 1e6:.2f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-f", "--filters", type=int, default=10000)
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    parser.add_argument("-t", "--topics", type=int, default=1000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+
+    # Filters like those of the sample aggregator and FIWARE connector
+    filters = [
+        f"data/measurements/site{i % 100}/{rnd.choice(['+', f'dev{i}'])}/+"
+        for i in range(args.filters)
+    ]
+
+    topics = [
+        f"data/measurements/site{rnd.randrange(100)}"
+        f"/dev{rnd.randrange(args.filters)}/mp{rnd.randrange(8)}"
+        for _ in range(args.topics)
+    ]
+
+    def callback(msg):
+        pass
+
+    router = TopicRouter()
+    uncached = TopicRouter(cache_size=0)
+    matcher = MQTTMatcher()
+    for topic_filter in filters:
+        router.insert(topic_filter, callback)
+        uncached.insert(topic_filter, callback)
+        matcher[topic_filter] = callback
+
+    sample = [rnd.choice(topics) for _ in range(args.count)]
+
+    start = time.perf_counter()
+    for topic in sample:
+        uncached.match(topic)
+    report("TopicRouter (uncached)", time.perf_counter() - start, args.count)
+
+    start = time.perf_counter()
+    for topic in sample:
+        router.match(topic)
+    report("TopicRouter (cached)", time.perf_counter() - start, args.count)
+
+    start = time.perf_counter()
+    for topic in sample:
+        list(matcher.iter_match(topic))
+    report("paho MQTTMatcher", time.perf_counter() - start, args.count)
+
+    count = max(args.count // 100, 1)
+    start = time.perf_counter()
+    for topic in sample[:count]:
+        [f for f in filters if mqtt.topic_matches_sub(f, topic)]
+    report("Linear scan", time.perf_counter() - start, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/bin/env python
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+# Measures the latency of small-object puts and gets through store.Client.
+#
+# Run against the MinIO instance of the local Docker Compose stack:
+#   docker compose up --detach minio
+#   poetry run python scripts/benchmark-store.py --count 1000 --size 1024
+
+import os
+import time
+import argparse
+import statistics
+
+from seguro.common import store
+
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    print(
+        f"{name}: n={len(latencies)} "
+        f"mean={statistics.mean(latencies) * 1e3:.2f}ms "
+        f"p50={quantiles[49] * 1e3:.2f}ms "
+        f"p95={quantiles[94] * 1e3:.2f}ms "
+        f"p99={quantiles[98] * 1e3:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--count", type=int, default=500)
+    parser.add_argument("-s", "--size", type=int, default=1024)
+    parser.add_argument("-p", "--prefix", type=str, default="benchmark/")
+
+    args = parser.parse_args()
+
+    s = store.Client()
+    payload = os.urandom(args.size)
+    names = [f"{args.prefix}{i}" for i in range(args.count)]
+
+    puts = []
+    for name in names:
+        start = time.perf_counter()
+        s.put_file_contents(name, payload)
+        puts.append(time.perf_counter() - start)
+
+    gets = []
+    for name in names:
+        start = time.perf_counter()
+        resp = s.get_file_contents(name)
+        resp.read()
+        resp.release_conn()
+        gets.append(time.perf_counter() - start)
+
+    report("put_file_contents", puts)
+    report("get_file_contents", gets)
+
+    for name in names:
+        s.remove_file(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -50,9 +50,7 @@ def get_acls(s: cstore.Client, prefix: str):
         acl_path = pathlib.Path(obj.object_name)
         acl_name = acl_path.stem
 
-        resp = s.get_file_contents(acl_path.as_posix())
-
-        acl_dict = yaml.load(resp, yaml.SafeLoader)
+        acl_dict = s.get_cached_contents(acl_path.as_posix(), yaml.safe_load)
 
         try:
             acl = model.AccessControlList(**acl_dict)
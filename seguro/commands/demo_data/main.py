@@ -3,6 +3,8 @@
 
 import sys
 import time
+import signal
+import threading
 import random
 import logging
 import argparse
@@ -10,7 +12,7 @@ import environ
 from pytimeparse import parse as timeparse
 from datetime import datetime, timedelta
 
-from villas.node.formats import Protobuf, Sample, Timestamp
+from villas.node.formats import Sample, Timestamp
 
 from seguro.common import broker, config
 
@@ -22,6 +24,8 @@ RATE = env.float("RATE", 10.0)
 VALUES = env.int("VALUES", 6)
 BLOCK_INTERVAL = env.str("BLOCK_INTERVAL", "1m")
 SAMPLE_TYPE = env.str("SAMPLE_TYPE", "simple")
+BATCH_SIZE = env.int("BATCH_SIZE", 1)
+BATCH_LINGER = env.float("BATCH_LINGER", 1.0)
 
 
 def main() -> int:
@@ -63,6 +67,18 @@ def main() -> int:
         help="Type of sample data to generate",
         choices=["simple", "measurement"],
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Maximum number of samples published in a single message",
+    )
+    parser.add_argument(
+        "--batch-linger",
+        type=float,
+        default=BATCH_LINGER,
+        help="Maximum time in seconds a sample is kept back for batching",
+    )
 
     args = parser.parse_args()
 
@@ -73,12 +89,32 @@ def main() -> int:
     )
 
     b = broker.Client("demo-data")
-    pb = Protobuf()
+
+    publisher: broker.Client | broker.BatchPublisher = b
+    if args.batch_size > 1:
+        publisher = broker.BatchPublisher(
+            b, max_samples=args.batch_size, linger=args.batch_linger
+        )
 
     last_block = datetime.now()
     block_interval = timedelta(seconds = args.block_interval)
 
-    while True:
+    stop = threading.Event()
+
+    def signal_handler(signum: int, frame):
+        """Callback which gets called for received signals
+
+        Args:
+          signum: The signal number
+          frame:
+
+        """
+        stop.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    while not stop.is_set():
 
         if args.sample_type == "simple":
             data = args.values * [0.0]
@@ -128,9 +164,13 @@ def main() -> int:
             last_block = datetime.now()
             logging.info("Starting new block")
         logging.debug("Publishing sample: %s", smp)
-        b.publish(args.topic, pb.dumpb([smp]))
+        publisher.publish_samples(args.topic, [smp])
+
+        stop.wait(1.0 / args.rate)
 
-        time.sleep(1.0 / args.rate)
+    # Publish the last partial batch before exiting
+    if isinstance(publisher, broker.BatchPublisher):
+        publisher.close()
 
     return 0
 
@@ -33,6 +33,10 @@ ID_MAPPING_JSON = env.str("ID_MAPPING_JSON", None)
 
 HTTP_TIMEOUT = env.int("HTTP_TIMEOUT", 10)
 
+# Number of threads which post samples to FIWARE. Samples of the same topic
+# are always posted in order by the same thread.
+WORKERS = env.int("WORKERS", 4)
+
 FORMAT_STRING = (
     "{timestamp}|"
     + "dateObservedFrom|{dateObservedFrom}|"
@@ -242,15 +246,20 @@ def main() -> int:
                 if ret is not None:
                     logging.debug(ret.text)
 
-    b = broker.Client(CONNECTOR_ID)
+    b = broker.Client(CONNECTOR_ID, workers=WORKERS)
     identifier_map = (
         None
         if ID_MAPPING_JSON is None
         else parse_identfier_map(ID_MAPPING_JSON)
     )
 
+    # Replicas of a scaled job split the samples between them
+    group = broker.job_group()
+
     for topic in TOPIC.split(","):
-        b.subscribe_samples(topic, partial(callback, identifier_map))
+        b.subscribe_samples(
+            topic, partial(callback, identifier_map), group=group
+        )
 
     logging.info("Subscribed to %s", TOPIC)
     logging.info("FIWARE URL: %s/?k=%s&i=%s", URL, API_KEY, "<identifier>")
@@ -261,6 +270,8 @@ def main() -> int:
         except KeyboardInterrupt:
             break
 
+    b.stop_listening()
+
     return 0
 
 
@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+import logging
+import argparse
+import datetime
+import posixpath
+import pandas as pd
+from pytimeparse import parse as timeparse
+
+from seguro.common import store, config
+from seguro.common.layout import object_time, object_topic
+
+# A group of frame objects is identified by its directory and hour
+Partition = tuple[str, datetime.datetime]
+
+
+def get_partitions(
+    s: store.Client, prefix: str, flat: bool = False
+) -> dict[Partition, list[str]]:
+    """Group all frame objects below a prefix by directory and hour.
+
+    Args:
+      s: S3 store client
+      prefix: The prefix below which frame objects are searched
+      flat: Also include frame objects of the flat layout
+
+    Returns:
+        The object names of each partition
+    """
+    partitions: dict[Partition, list[str]] = {}
+
+    for obj in s.client.list_objects(s.bucket, prefix=prefix, recursive=True):
+        name: str = obj.object_name
+        if not name.endswith(".parquet"):
+            continue
+
+        # Frames of the flat layout are not partitioned by hour
+        if not flat and object_topic(name) == posixpath.dirname(name):
+            logging.debug("Ignoring object of flat layout: %s", name)
+            continue
+
+        ts = object_time(name)
+        if ts is None:
+            logging.debug("Ignoring object without timestamp: %s", name)
+            continue
+
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        key = (posixpath.dirname(name), hour)
+
+        partitions.setdefault(key, []).append(name)
+
+    return partitions
+
+
+def compact(
+    s: store.Client,
+    partition: Partition,
+    objs: list[str],
+    row_group_size: int,
+) -> str:
+    """Merge the frame objects of a partition into a single object.
+
+    Rows which are contained in multiple objects are only kept once so that
+    an interrupted compaction can safely be repeated.
+
+    Args:
+      s: S3 store client
+      partition: The partition
+      objs: The names of the frame objects in the partition
+      row_group_size: Maximum number of rows per Parquet row group
+
+    Returns:
+        The name of the compacted object
+    """
+    directory, hour = partition
+    name = posixpath.join(directory, f"{hour.isoformat()}_compacted.parquet")
+
+    df = pd.concat([s.get_frame(obj) for obj in sorted(objs)])
+
+    if "sequence" in df.columns:
+        keys = pd.MultiIndex.from_arrays([df.index, df["sequence"]])
+        df = df[~keys.duplicated()]
+    else:
+        df = df[~df.index.duplicated()]
+
+    df = df.sort_index()
+
+    logging.info(
+        "Compacting %d objects with %d rows into %s", len(objs), len(df), name
+    )
+
+    s.put_frame(name, df, row_group_size=row_group_size, write_statistics=True)
+
+    for obj in objs:
+        if obj != name:
+            s.remove_file(obj)
+
+    return name
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-p", "--prefix", type=str, default="data")
+    parser.add_argument(
+        "-a",
+        "--min-age",
+        type=timeparse,
+        default="1h",
+        help="Only compact hours which ended at least this long ago",
+    )
+    parser.add_argument(
+        "-m",
+        "--min-objects",
+        type=int,
+        default=2,
+        help="Only compact hours consisting of at least this many objects",
+    )
+    parser.add_argument(
+        "-r",
+        "--row-group-size",
+        type=int,
+        default=64 * 1024,
+        help="Maximum number of rows per Parquet row group",
+    )
+    parser.add_argument(
+        "--flat",
+        action="store_true",
+        help="Also compact frames of the flat layout which are then removed",
+    )
+    parser.add_argument(
+        "-l",
+        "--log-level",
+        default="debug" if config.DEBUG else "info",
+        help="Logging level",
+        choices=["debug", "info", "warn", "error", "critical"],
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s.%(msecs)03d %(levelname)s %(name)s %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+    s = store.Client()
+
+    min_age = datetime.timedelta(seconds=args.min_age)
+    rc = 0
+
+    partitions = get_partitions(s, args.prefix, args.flat)
+
+    for partition, objs in sorted(partitions.items()):
+        _, hour = partition
+
+        now = datetime.datetime.now(hour.tzinfo)
+        if hour + datetime.timedelta(hours=1) + min_age > now:
+            continue
+
+        if len(objs) < args.min_objects:
+            continue
+
+        try:
+            compact(s, partition, objs, args.row_group_size)
+        except Exception as e:
+            rc = 1
+            logging.error("Failed to compact %s: %s", partition, e)
+
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
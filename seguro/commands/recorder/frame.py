@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import numpy as np
+import pandas as pd
+
+from villas.node.sample import Sample, Timestamp
+
+
+class FrameBuilder:
+    """Columnar accumulator for the samples of a single frame.
+
+    Timestamps, sequence numbers and signal values are written into growable
+    NumPy buffers as samples arrive. Hence, no Sample objects are kept alive
+    and the final DataFrame is assembled from whole columns.
+
+    Args:
+      capacity: Initial number of rows which are allocated.
+
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+
+        self.start: Timestamp | None
+        self.length: int
+        self.kinds: list[type]
+
+        self._ts: np.ndarray
+        self._seq: np.ndarray
+        self._values: np.ndarray
+
+        self.reset()
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes occupied by the samples of the current frame."""
+        row = self._ts.itemsize + self._seq.itemsize
+        row += self._values.itemsize * self._values.shape[1]
+
+        return self.length * row
+
+    def append(self, sample: Sample):
+        """Append a single sample to the frame.
+
+        Args:
+          sample: The sample which should be appended
+
+        """
+        if self.length == 0:
+            self.start = sample.ts_origin
+
+        if self.length == len(self._ts):
+            self._grow(2 * len(self._ts), self._values.shape[1])
+
+        values = len(sample.data)
+        if values > self._values.shape[1]:
+            self._grow(len(self._ts), values)
+
+        for i in range(len(self.kinds), values):
+            self.kinds.append(type(sample.data[i]))
+
+        if self._values.dtype != np.complex128 and any(
+            isinstance(v, complex) for v in sample.data
+        ):
+            vals = self._values.astype(np.complex128)
+            vals[np.isnan(self._values)] = complex(np.nan, np.nan)
+            self._values = vals
+
+        for i, v in enumerate(sample.data):
+            self.kinds[i] = _widen(self.kinds[i], type(v))
+
+        row = self.length
+        ts = sample.ts_origin
+        self._ts[row] = ts.seconds * 1_000_000_000 + ts.nanoseconds
+        self._seq[row] = sample.sequence
+        self._values[row, :values] = sample.data
+
+        self.length += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """Assemble a Pandas DataFrame from the columns of the current frame.
+
+        Returns:
+            The DataFrame indexed by the origin timestamps of the samples.
+
+        """
+        n = self.length
+
+        index = pd.DatetimeIndex(self._ts[:n].view("datetime64[ns]"))
+        data: dict[str, np.ndarray] = {"sequence": self._seq[:n]}
+
+        for i, kind in enumerate(self.kinds):
+            col = self._values[:n, i]
+
+            if kind is complex:
+                data[f"signal{i}.real"] = col.real
+                data[f"signal{i}.imag"] = col.imag
+                continue
+
+            col = col.real
+            if kind in (int, bool) and not np.isnan(col).any():
+                col = col.astype(kind)
+
+            data[f"signal{i}"] = col
+
+        return pd.DataFrame(data, index)
+
+    def reset(self):
+        """Discard all samples of the current frame."""
+        self.start = None
+        self.length = 0
+        self.kinds = []
+
+        self._ts = np.empty(self.capacity, dtype=np.int64)
+        self._seq = np.empty(self.capacity, dtype=np.int64)
+        self._values = np.empty((self.capacity, 0), dtype=np.float64)
+
+    def _grow(self, rows: int, values: int):
+        """Enlarge the buffers while preserving the samples recorded so far.
+
+        Args:
+          rows: The new number of rows
+          values: The new number of signals
+
+        """
+        n = self.length
+
+        ts = np.empty(rows, dtype=np.int64)
+        ts[:n] = self._ts[:n]
+        self._ts = ts
+
+        seq = np.empty(rows, dtype=np.int64)
+        seq[:n] = self._seq[:n]
+        self._seq = seq
+
+        # Missing values are padded with NaNs
+        fill = complex(np.nan, np.nan)
+        if self._values.dtype != np.complex128:
+            fill = np.nan
+
+        vals = np.full((rows, values), fill, dtype=self._values.dtype)
+        vals[:n, : self._values.shape[1]] = self._values[:n]
+        self._values = vals
+
+
+def _widen(kind: type, other: type) -> type:
+    """Get the narrowest type of a column which holds values of both types.
+
+    Args:
+      kind: The current type of the column
+      other: The type of a new value in the column
+
+    Returns:
+        The type of the column
+    """
+    if kind is other:
+        return kind
+
+    for wider in (complex, float, int):
+        if wider in (kind, other):
+            return wider
+
+    return kind
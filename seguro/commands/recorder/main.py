@@ -1,26 +1,63 @@
 # SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
 # SPDX-License-Identifier: Apache-2.0
 
+import os
 import sys
+import signal
 import argparse
 import logging
+import threading
 import time
+import zlib
+import multiprocessing
 import functools as ft
+from pathlib import Path
+from typing import Callable
+from pytimeparse import parse as timeparse
 
 from seguro.common import store, broker, config
 from seguro.common.broker import Sample
-from seguro.commands.recorder.recorder import Recorder
+from seguro.common.layout import (
+    Layout,
+    object_name,
+    object_topic,
+)
+from seguro.commands.recorder.recorder import Recorder, RolloverPolicy
+from seguro.commands.recorder.spool import Spool
+from seguro.commands.recorder.uploader import Uploader
 
 recorders: dict[str, Recorder] = {}
 
 
+def shard_of(topic: str, shards: int) -> int:
+    """Get the shard which records the samples of a topic.
+
+    Args:
+      topic: The MQTT topic
+      shards: The total number of shards
+
+    Returns:
+        The index of the shard
+    """
+    return zlib.crc32(topic.encode()) % shards
+
+
 def on_samples(
-    s: store.Client, _b: broker.Client, topic: str, samples: list[Sample]
+    u: Uploader,
+    policy: RolloverPolicy,
+    spool: Spool | None,
+    layout: Layout,
+    _b: broker.Client,
+    topic: str,
+    samples: list[Sample],
 ):
     """Callback for each received block of received samples.
 
     Args:
-      s: S3 store client
+      u: The uploader which writes frames to the store
+      policy: The rollover policy for new recorders
+      spool: The optional write-ahead spool
+      layout: The naming scheme of frame objects
       _b: MQTT broker client
       topic: The MQTT topic on which the samples have been received
       samples: The list of received samples
@@ -29,16 +66,108 @@ def on_samples(
     try:
         recorder = recorders[topic]
     except KeyError:
-        recorder = Recorder(s, topic)
+        recorder = Recorder(u, topic, policy, spool, layout)
         recorders[topic] = recorder
 
     recorder.record_samples(samples)
 
 
+def on_message(
+    owns: Callable[[str], bool],
+    cb: Callable[[broker.Client, str, list[Sample]], None],
+    b: broker.Client,
+    msg: broker.Message,
+):
+    """Callback for each received MQTT message.
+
+    Messages of topics belonging to other shards are dropped before they
+    are decoded.
+
+    Args:
+      owns: Filter for topics which are recorded by this shard
+      cb: The callback for decoded samples
+      b: MQTT broker client
+      msg: The MQTT message
+
+    """
+    if owns(msg.topic):
+        cb(b, msg.topic, b.formatter.loadb(msg.payload))
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-p", "--prefix", type=str, default="data")
+    parser.add_argument(
+        "-w",
+        "--upload-workers",
+        type=int,
+        default=2,
+        help="Number of threads uploading frames to the store",
+    )
+    parser.add_argument(
+        "-q",
+        "--upload-queue",
+        type=int,
+        default=16,
+        help="Maximum number of frames waiting for upload",
+    )
+    parser.add_argument(
+        "--max-samples",
+        type=int,
+        help="Maximum number of samples per frame",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Maximum in-memory size of a frame in bytes",
+    )
+    parser.add_argument(
+        "--max-duration",
+        type=timeparse,
+        help="Maximum wall-clock duration of a frame (e.g. 10m)",
+    )
+    parser.add_argument(
+        "--align",
+        type=timeparse,
+        help="Start new frames at multiples of this interval (e.g. 1m)",
+    )
+    parser.add_argument(
+        "--spool-dir",
+        type=Path,
+        help="Directory for journaling samples until their upload succeeded",
+    )
+    parser.add_argument(
+        "--spool-sync",
+        action="store_true",
+        help="Call fsync() after each write to the spool",
+    )
+    parser.add_argument(
+        "--spool-retry",
+        type=timeparse,
+        default="1m",
+        help="Interval at which failed uploads are retried from the spool",
+    )
+    parser.add_argument(
+        "--layout",
+        type=Layout,
+        default=Layout.FLAT,
+        choices=list(Layout),
+        help="Naming scheme of frame objects (flat or hive-partitioned)",
+    )
+    parser.add_argument(
+        "-n",
+        "--shards",
+        type=int,
+        default=1,
+        help="Number of processes between which topics are partitioned",
+    )
+    parser.add_argument(
+        "-i",
+        "--shard",
+        type=int,
+        help="Only run the shard with the given index",
+    )
     parser.add_argument(
         "-l",
         "--log-level",
@@ -49,26 +178,147 @@ def main() -> int:
 
     args = parser.parse_args()
 
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+
+    if args.shard is not None and not 0 <= args.shard < args.shards:
+        parser.error(f"--shard must be between 0 and {args.shards - 1}")
+
     logging.basicConfig(
         level=args.log_level.upper(),
         format="%(asctime)s.%(msecs)03d %(levelname)s %(name)s %(message)s",
         datefmt="%H:%M:%S",
     )
 
+    if args.shard is not None:
+        return record(args, args.shard)
+    elif args.shards == 1:
+        return record(args, 0)
+
+    procs = [
+        multiprocessing.Process(
+            target=record, args=(args, shard), name=f"recorder-{shard}"
+        )
+        for shard in range(args.shards)
+    ]
+
+    for proc in procs:
+        proc.start()
+
+    def signal_handler(signum: int, frame):
+        """Callback which gets called for received signals
+
+        Args:
+          signum: The signal number
+          frame:
+
+        """
+        for proc in procs:
+            if proc.pid is not None:
+                os.kill(proc.pid, signum)
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    rc = 0
+    for proc in procs:
+        proc.join()
+        rc |= proc.exitcode or 0
+
+    return rc
+
+
+def record(args: argparse.Namespace, shard: int) -> int:
+    """Record all topics belonging to a shard.
+
+    Args:
+      args: The parsed command line arguments
+      shard: The index of the shard
+
+    Returns:
+        The exit code
+    """
+
+    def owns(topic: str) -> bool:
+        return shard_of(topic, args.shards) == shard
+
+    def owns_object(filename: str) -> bool:
+        return owns(object_topic(filename))
+
     b = broker.Client("recorder")
     s = store.Client()
+    u = Uploader(s, args.upload_workers, args.upload_queue)
+    policy = RolloverPolicy(
+        max_samples=args.max_samples,
+        max_bytes=args.max_bytes,
+        max_duration=args.max_duration,
+        align=args.align,
+    )
+
+    spool = None
+    if args.spool_dir:
+        spool = Spool(args.spool_dir, args.spool_sync)
+        spool.recover(
+            lambda topic, smp: object_name(
+                topic, smp.ts_origin, layout=args.layout
+            ),
+            owns,
+        )
+        spool.replay(u, owns_object)
 
     topic = f"{args.prefix}/#"
 
-    b.subscribe_samples(topic, ft.partial(on_samples, s))
+    cb = ft.partial(on_samples, u, policy, spool, args.layout)
+
+    # All samples of a topic must be recorded by the same shard. Hence, a
+    # shared subscription which splits them between clients is not used.
+    b.subscribe(topic, ft.partial(on_message, owns, cb))
+
+    logging.info(
+        "Subscribed to topic: %s (shard %d of %d)",
+        topic,
+        shard + 1,
+        args.shards,
+    )
+
+    stop = threading.Event()
+
+    def signal_handler(signum: int, frame):
+        """Callback which gets called for received signals
+
+        Args:
+          signum: The signal number
+          frame:
+
+        """
+        stop.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    last_stats = last_replay = time.monotonic()
+    while not stop.wait(1):
+        for recorder in list(recorders.values()):
+            recorder.poll()
+
+        if spool and time.monotonic() - last_replay > args.spool_retry:
+            last_replay = time.monotonic()
+            spool.replay(u, owns_object)
+
+        if time.monotonic() - last_stats > 60:
+            last_stats = time.monotonic()
+            logging.info("Upload statistics: %s", u.stats())
+
+    logging.info("Flushing pending frames")
+
+    b.stop_listening()
+
+    for recorder in recorders.values():
+        recorder.flush()
 
-    logging.info("Subscribed to topic: %s", topic)
+    u.stop()
 
-    while True:
-        try:
-            time.sleep(1)
-        except KeyboardInterrupt:
-            break
+    logging.info("Upload statistics: %s", u.stats())
 
     return 0
 
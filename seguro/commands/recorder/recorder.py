@@ -2,27 +2,69 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
-import math
-from pathlib import Path
-import pandas as pd
-
-from seguro.common import store
+import threading
+import time
+from dataclasses import dataclass
+
+from seguro.commands.recorder.frame import FrameBuilder
+from seguro.common.layout import Layout, object_name
+from seguro.commands.recorder.spool import Spool
+from seguro.commands.recorder.uploader import Uploader
 from villas.node.sample import Sample
 
 
+@dataclass
+class RolloverPolicy:
+    """Conditions which close the current frame in addition to samples
+    carrying the new_frame flag.
+
+    Args:
+      max_samples: Maximum number of samples per frame
+      max_bytes: Maximum size of the in-memory columns of a frame
+      max_duration: Maximum wall-clock time in seconds a frame is kept open
+      align: Interval in seconds at whose boundaries a new frame is started
+             based on the origin timestamps of the samples (e.g. 60 for
+             minute-aligned frames)
+
+    """
+
+    max_samples: int | None = None
+    max_bytes: int | None = None
+    max_duration: float | None = None
+    align: float | None = None
+
+
 class Recorder:
-    def __init__(self, s: store.Client, topic: str):
-        self.path = Path(topic)
+    def __init__(
+        self,
+        uploader: Uploader,
+        topic: str,
+        policy: RolloverPolicy = RolloverPolicy(),
+        spool: Spool | None = None,
+        layout: Layout = Layout.FLAT,
+    ):
+        self.topic = topic
+        self.layout = layout
 
         logger_name = ".".join(["recorder"] + topic.split("/")[1:])
         self.logger = logging.getLogger(logger_name)
 
-        self.store = s
+        self.uploader = uploader
+        self.policy = policy
+
+        self.frame = FrameBuilder()
+
+        self.spool = spool
+        self.journal = spool.topic(topic) if spool else None
+
+        # Wall-clock time and alignment interval of the current frame
+        self._opened = 0.0
+        self._interval = 0
 
-        self.samples: list[Sample]
-        self.max_values: int
+        self._last_obj_name: str | None = None
 
-        self._reset()
+        # Guards the current frame which is also accessed by poll()
+        self._lock = threading.Lock()
 
     def record_samples(self, samples: list[Sample]):
         """
@@ -34,66 +76,102 @@ class Recorder:
         """
         self.logger.debug("Recording %d samples", len(samples))
 
-        for sample in samples:
-            if sample.new_frame:
+        with self._lock:
+            # Samples of the current frame which are not yet journaled
+            pending: list[Sample] = []
+
+            for sample in samples:
+                if sample.new_frame or self._is_expired(sample):
+                    self._journal(pending)
+                    self._write_frame()
+
+                if len(self.frame) == 0:
+                    self._opened = time.monotonic()
+                    self._interval = self._get_interval(sample)
+
+                self.frame.append(sample)
+                pending.append(sample)
+
+                if self._is_full():
+                    self._journal(pending)
+                    self._write_frame()
+
+            self._journal(pending)
+
+    def poll(self):
+        """Close the current frame if it exceeded its maximum duration.
+
+        This needs to be called periodically to also close frames of
+        topics which stopped receiving samples.
+        """
+        with self._lock:
+            if self._is_expired():
                 self._write_frame()
 
-            self.samples.append(sample)
-            self.max_values = max(self.max_values, len(sample.data))
+    def flush(self):
+        """Hand over the current frame for uploading, even if incomplete."""
+        with self._lock:
+            self._write_frame()
+
+    def _is_full(self) -> bool:
+        if (limit := self.policy.max_samples) and len(self.frame) >= limit:
+            return True
+
+        if (limit := self.policy.max_bytes) and self.frame.nbytes >= limit:
+            return True
+
+        return False
+
+    def _is_expired(self, sample: Sample | None = None) -> bool:
+        if len(self.frame) == 0:
+            return False
+
+        if duration := self.policy.max_duration:
+            if time.monotonic() - self._opened >= duration:
+                return True
+
+        if sample is not None and self.policy.align:
+            if self._get_interval(sample) != self._interval:
+                return True
+
+        return False
+
+    def _get_interval(self, sample: Sample) -> int:
+        if not self.policy.align:
+            return 0
+
+        ts = sample.ts_origin
+        ts_ns = ts.seconds * 1_000_000_000 + ts.nanoseconds
+
+        return ts_ns // int(self.policy.align * 1_000_000_000)
+
+    def _journal(self, samples: list[Sample]):
+        if self.journal is not None:
+            self.journal.append(samples)
+
+        samples.clear()
 
     def _write_frame(self):
-        if len(self.samples) == 0:
+        if len(self.frame) == 0:
             return
 
-        self.logger.info(
-            "Writing frame object containing %d samples",
-            len(self.samples),
-        )
+        frame, self.frame = self.frame, FrameBuilder()
 
-        index = [
-            pd.Timestamp(
-                sample.ts_origin.seconds * 1000000000
-                + sample.ts_origin.nanoseconds
+        assert frame.start is not None
+        obj_name = object_name(self.topic, frame.start, layout=self.layout)
+
+        # Frames closed by size limits may start within the same second
+        if obj_name == self._last_obj_name:
+            obj_name = object_name(
+                self.topic, frame.start, precise=True, layout=self.layout
             )
-            for sample in self.samples
-        ]
-        data = {"sequence": [sample.sequence for sample in self.samples]}
-
-        for i in range(self.max_values):
-            if isinstance(self.samples[0].data[i], complex):
-                data.update(
-                    {
-                        f"signal{i}.real": [
-                            smp.data[i].real if i < len(smp.data) else math.nan
-                            for smp in self.samples
-                        ],
-                        f"signal{i}.imag": [
-                            smp.data[i].imag if i < len(smp.data) else math.nan
-                            for smp in self.samples
-                        ],
-                    }
-                )
-
-            else:
-                data.update(
-                    {
-                        f"signal{i}": [
-                            smp.data[i] if i < len(smp.data) else math.nan
-                            for smp in self.samples
-                        ]
-                    }
-                )
-
-        df = pd.DataFrame(data, index)
-
-        ts = self.samples[0].ts_origin.datetime()
-        ts = ts.replace(microsecond=0)
-        obj_path = self.path / f"{ts.isoformat()}.parquet"
-
-        self.store.put_frame(obj_path.as_posix(), df)
-
-        self._reset()
-
-    def _reset(self):
-        self.samples = []
-        self.max_values = 0
+
+        self._last_obj_name = obj_name
+
+        self.logger.debug("Queuing frame object %s", obj_name)
+
+        if self.spool is not None and self.journal is not None:
+            path = self.journal.seal(obj_name)
+            self.spool.submit(self.uploader, obj_name, path, frame)
+        else:
+            self.uploader.submit(obj_name, frame)
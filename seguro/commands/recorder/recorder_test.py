@@ -0,0 +1,206 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import math
+
+from villas.node.sample import Sample, Timestamp
+
+from seguro.commands.recorder.frame import FrameBuilder
+from seguro.common.layout import object_name
+from seguro.commands.recorder.recorder import Recorder, RolloverPolicy
+from seguro.commands.recorder.spool import Spool, read_samples
+
+
+class Uploader:
+    def __init__(self):
+        self.frames: list[tuple[str, FrameBuilder]] = []
+
+    def submit(self, filename: str, frame: FrameBuilder, done=None):
+        self.frames.append((filename, frame))
+
+        if done is not None:
+            done(True)
+
+
+class FailingUploader:
+    def submit(self, filename: str, frame: FrameBuilder, done=None):
+        if done is not None:
+            done(False)
+
+
+def sample(seq: int, data: list) -> Sample:
+    return Sample(
+        ts_origin=Timestamp(seconds=1700000000 + seq, nanoseconds=500),
+        sequence=seq,
+        data=data,
+    )
+
+
+def test_frame_builder():
+    fb = FrameBuilder(capacity=2)
+
+    fb.append(sample(0, [1.0, 2, True, complex(1, -1)]))
+    fb.append(sample(1, [3.0, 4, False, complex(2, -2)]))
+    fb.append(sample(2, [5.0, 6, True, complex(3, -3)]))
+
+    assert len(fb) == 3
+    assert fb.start is not None
+
+    df = fb.to_frame()
+
+    assert list(df.columns) == [
+        "sequence",
+        "signal0",
+        "signal1",
+        "signal2",
+        "signal3.real",
+        "signal3.imag",
+    ]
+    assert list(df["sequence"]) == [0, 1, 2]
+    assert list(df["signal0"]) == [1.0, 3.0, 5.0]
+    assert list(df["signal1"]) == [2, 4, 6]
+    assert df["signal1"].dtype == "int64"
+    assert list(df["signal2"]) == [True, False, True]
+    assert list(df["signal3.real"]) == [1.0, 2.0, 3.0]
+    assert list(df["signal3.imag"]) == [-1.0, -2.0, -3.0]
+    assert df.index[1].value == 1700000001 * 1_000_000_000 + 500
+
+    fb.reset()
+
+    assert len(fb) == 0
+    assert fb.start is None
+
+
+def test_frame_builder_padding():
+    fb = FrameBuilder()
+
+    fb.append(sample(0, [1.0]))
+    fb.append(sample(1, [2.0, 3]))
+    fb.append(sample(2, [4.0, 5, complex(6, 7)]))
+
+    df = fb.to_frame()
+
+    assert list(df["signal0"]) == [1.0, 2.0, 4.0]
+    assert math.isnan(df["signal1"].iloc[0])
+    assert df["signal1"].iloc[2] == 5.0
+    assert math.isnan(df["signal2.real"].iloc[1])
+    assert math.isnan(df["signal2.imag"].iloc[1])
+    assert df["signal2.imag"].iloc[2] == 7.0
+
+
+def test_frame_builder_widening():
+    fb = FrameBuilder()
+
+    fb.append(sample(0, [1, True, 2]))
+    fb.append(sample(1, [2.5, 3, 3]))
+
+    df = fb.to_frame()
+
+    assert list(df["signal0"]) == [1.0, 2.5]
+    assert df["signal0"].dtype == "float64"
+    assert list(df["signal1"]) == [1, 3]
+    assert df["signal1"].dtype == "int64"
+    assert list(df["signal2"]) == [2, 3]
+    assert df["signal2"].dtype == "int64"
+
+
+def test_rollover_max_samples():
+    u = Uploader()
+    r = Recorder(u, "data/test", RolloverPolicy(max_samples=2))  # type: ignore
+
+    r.record_samples([sample(i, [float(i)]) for i in range(5)])
+
+    assert [len(frame) for _, frame in u.frames] == [2, 2]
+    assert u.frames[0][0] != u.frames[1][0]
+
+    r.flush()
+
+    assert [len(frame) for _, frame in u.frames] == [2, 2, 1]
+
+
+def test_rollover_align():
+    u = Uploader()
+    r = Recorder(u, "data/test", RolloverPolicy(align=2))  # type: ignore
+
+    # Sample timestamps are one second apart
+    r.record_samples([sample(i, [float(i)]) for i in range(5)])
+    r.flush()
+
+    assert [len(frame) for _, frame in u.frames] == [2, 2, 1]
+
+
+def test_rollover_new_frame():
+    u = Uploader()
+    r = Recorder(u, "data/test")  # type: ignore
+
+    smps = [sample(i, [float(i)]) for i in range(4)]
+    smps[2].new_frame = True
+
+    r.record_samples(smps)
+
+    assert [len(frame) for _, frame in u.frames] == [2]
+
+
+def test_spool(tmp_path):
+    s = Spool(tmp_path)
+    u = Uploader()
+    r = Recorder(u, "data/test", spool=s)  # type: ignore
+
+    smps = [sample(i, [float(i), complex(i, -i)]) for i in range(4)]
+    smps[2].new_frame = True
+
+    r.record_samples(smps)
+
+    # The uploaded frame has been removed from the spool
+    assert len(u.frames) == 1
+    assert s.pending() == []
+
+    journal = tmp_path / "data/test/current.spool"
+    assert [smp.sequence for smp in read_samples(journal)] == [2, 3]
+
+    # Seal the open frame as if the recorder had crashed
+    s.recover(lambda topic, smp: object_name(topic, smp.ts_origin))
+
+    assert len(s.pending()) == 1
+
+    s.replay(FailingUploader())  # type: ignore
+
+    assert len(s.pending()) == 1
+
+    s.replay(u)  # type: ignore
+
+    assert s.pending() == []
+    assert len(u.frames) == 2
+    assert list(u.frames[1][1].to_frame()["sequence"]) == [2, 3]
+
+
+def test_spool_recover_clash(tmp_path):
+    s = Spool(tmp_path)
+
+    def name(topic: str, smp: Sample) -> str:
+        return object_name(topic, smp.ts_origin)
+
+    for _ in range(2):
+        journal = s.topic("data/test")
+        journal.append([sample(0, [1.0])])
+        journal._file.close()
+
+        s.recover(name)
+
+    assert [filename for filename, _ in s.pending()] == [
+        name("data/test", sample(0, [])),
+        name("data/test", sample(0, [])).replace(".parquet", "_1.parquet"),
+    ]
+
+
+def test_spool_replay_vanished(tmp_path, monkeypatch):
+    s = Spool(tmp_path)
+    u = Uploader()
+
+    # The upload of a listed frame finished before it has been read
+    missing = s.sealed_path("data/test/missing.parquet")
+    monkeypatch.setattr(s, "pending", lambda: [("missing", missing)])
+
+    s.replay(u)  # type: ignore
+
+    assert u.frames == []
@@ -0,0 +1,280 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Iterator
+
+from villas.node.formats import Protobuf
+from villas.node.sample import Sample
+
+from seguro.commands.recorder.frame import FrameBuilder
+from seguro.commands.recorder.uploader import Uploader
+
+# Samples of the currently open frame of a topic
+ACTIVE = "current.spool"
+
+# Suffix of closed frames which are waiting for their upload
+SEALED = ".spool"
+
+_header = struct.Struct("<I")
+
+
+def read_samples(path: Path) -> Iterator[Sample]:
+    """Read all samples from a spool file.
+
+    A truncated record at the end of the file, e.g. after a crash, is
+    silently ignored.
+
+    Args:
+      path: The spool file
+
+    """
+    pb = Protobuf()
+
+    with open(path, "rb") as f:
+        while header := f.read(_header.size):
+            if len(header) < _header.size:
+                break
+
+            (length,) = _header.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                break
+
+            yield from pb.loadb(payload)
+
+
+class TopicSpool:
+    """Append-only journal of the samples of the open frame of a topic.
+
+    Args:
+      spool: The spool directory
+      topic: The MQTT topic of the recorder
+
+    """
+
+    def __init__(self, spool: "Spool", topic: str):
+        self.spool = spool
+        self.path = spool.path / topic / ACTIVE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._pb = Protobuf()
+        self._file = open(self.path, "ab")
+
+    def append(self, samples: list[Sample]):
+        """Append samples to the journal of the open frame.
+
+        Args:
+          samples: The samples which should be appended
+
+        """
+        if not samples:
+            return
+
+        payload = self._pb.dumpb(samples)
+
+        self._file.write(_header.pack(len(payload)) + payload)
+        self._file.flush()
+
+        if self.spool.sync:
+            os.fsync(self._file.fileno())
+
+    def seal(self, filename: str) -> Path:
+        """Close the journal of the open frame and start a new one.
+
+        Args:
+          filename: The object name at which the frame will be stored
+
+        Returns:
+            The path of the sealed journal
+        """
+        self._file.close()
+
+        path = self.spool.sealed_path(filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path, path)
+
+        self._file = open(self.path, "ab")
+
+        return path
+
+
+class Spool:
+    """Local write-ahead spool for frames of the recorder.
+
+    Samples are journaled to disk as they arrive. Closed frames are kept on
+    disk until their upload succeeded so they can be replayed after outages
+    of the store or restarts of the recorder.
+
+    Args:
+      path: Directory in which spool files are kept
+      sync: Call fsync() after each write
+
+    """
+
+    def __init__(self, path: Path, sync: bool = False):
+        self.path = path
+        self.sync = sync
+        self.logger = logging.getLogger(__name__)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._inflight: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def topic(self, topic: str) -> TopicSpool:
+        """Open the journal for a topic.
+
+        Args:
+          topic: The MQTT topic of the recorder
+
+        """
+        return TopicSpool(self, topic)
+
+    def sealed_path(self, filename: str) -> Path:
+        return self.path / (filename + SEALED)
+
+    def unique_path(self, filename: str) -> Path:
+        """Get a path for a sealed frame which does not exist yet.
+
+        Frames with clashing object names get a numbered suffix, e.g.
+        "<timestamp>_1.parquet".
+
+        Args:
+          filename: The object name of the frame
+
+        Returns:
+            The path of the sealed frame
+        """
+        path = self.sealed_path(filename)
+
+        stem = filename.removesuffix(".parquet")
+        n = 0
+        while path.exists():
+            n += 1
+            path = self.sealed_path(f"{stem}_{n}.parquet")
+
+        return path
+
+    def pending(self) -> list[tuple[str, Path]]:
+        """Get closed frames which have not been uploaded yet.
+
+        Returns:
+            A list of object names and spool files
+        """
+        return [
+            (path.relative_to(self.path).as_posix()[: -len(SEALED)], path)
+            for path in sorted(self.path.rglob("*.parquet" + SEALED))
+        ]
+
+    def recover(
+        self,
+        filename: Callable[[str, Sample], str],
+        owns: Callable[[str], bool] | None = None,
+    ):
+        """Seal journals of frames left open by a previous run.
+
+        This must be called before any recorder is started.
+
+        Args:
+          filename: Function which derives the object name from the topic
+                    and the first sample of a frame
+          owns: Optional filter which selects journals by their topic
+
+        """
+        for path in self.path.rglob(ACTIVE):
+            topic = path.parent.relative_to(self.path).as_posix()
+            if owns is not None and not owns(topic):
+                continue
+
+            first = next(read_samples(path), None)
+            if first is None:
+                path.unlink()
+                continue
+
+            # Do not overwrite a frame which has been sealed at the same time
+            sealed = self.unique_path(filename(topic, first))
+
+            self.logger.info("Recovered open frame of %s", topic)
+
+            sealed.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, sealed)
+
+    def submit(
+        self,
+        uploader: Uploader,
+        filename: str,
+        path: Path,
+        frame: FrameBuilder,
+    ):
+        """Queue a sealed frame for uploading and remove its spool file once
+        the upload succeeded.
+
+        Args:
+          uploader: The uploader
+          filename: The object name at which the frame should be stored
+          path: The spool file of the frame
+          frame: The frame
+
+        """
+
+        def done(ok: bool):
+            if ok:
+                path.unlink(missing_ok=True)
+            else:
+                self.logger.warning("Keeping %s for later replay", path)
+
+            with self._lock:
+                self._inflight.discard(path)
+
+        with self._lock:
+            self._inflight.add(path)
+
+        uploader.submit(filename, frame, done)
+
+    def replay(
+        self,
+        uploader: Uploader,
+        owns: Callable[[str], bool] | None = None,
+    ):
+        """Queue all closed frames which are not already being uploaded.
+
+        Args:
+          uploader: The uploader
+          owns: Optional filter which selects frames by their object name
+
+        """
+        for filename, path in self.pending():
+            if owns is not None and not owns(filename):
+                continue
+
+            # Keep concurrent uploads from removing the file while reading
+            with self._lock:
+                if path in self._inflight:
+                    continue
+
+                self._inflight.add(path)
+
+            frame = FrameBuilder()
+            try:
+                for sample in read_samples(path):
+                    frame.append(sample)
+            except FileNotFoundError:
+                # The upload finished after the spool has been listed
+                frame.reset()
+
+            if len(frame) == 0:
+                path.unlink(missing_ok=True)
+
+                with self._lock:
+                    self._inflight.discard(path)
+
+                continue
+
+            self.logger.info("Replaying frame %s", filename)
+
+            self.submit(uploader, filename, path, frame)
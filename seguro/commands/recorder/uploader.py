@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import threading
+import time
+from queue import Queue, Full
+from typing import Callable
+
+from seguro.common import store
+from seguro.commands.recorder.frame import FrameBuilder
+
+Done = Callable[[bool], None]
+
+
+class Uploader:
+    """Upload stage which writes frames to the store off the network thread.
+
+    Frames are handed over via a bounded queue and are encoded and uploaded
+    by a pool of worker threads. If the queue is full, submit() blocks the
+    caller and thereby applies back-pressure to the MQTT client.
+
+    Args:
+      s: S3 store client
+      workers: Number of worker threads
+      queue_size: Maximum number of frames waiting for upload
+
+    """
+
+    def __init__(
+        self,
+        s: store.Client,
+        workers: int = 2,
+        queue_size: int = 16,
+    ):
+        self.store = s
+        self.logger = logging.getLogger(__name__)
+
+        self.queue: Queue[tuple[str, FrameBuilder, Done | None] | None]
+        self.queue = Queue(queue_size)
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.uploaded = 0
+        self.failed = 0
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.max_depth = 0
+
+        self.workers = [
+            threading.Thread(target=self._run, name=f"uploader-{i}")
+            for i in range(workers)
+        ]
+
+        for worker in self.workers:
+            worker.start()
+
+    def submit(
+        self,
+        filename: str,
+        frame: FrameBuilder,
+        done: Done | None = None,
+    ):
+        """Queue a frame for uploading.
+
+        Args:
+          filename: The object name at which the frame should be stored
+          frame: The frame which should be uploaded. The caller must not
+                 modify it afterwards.
+          done: Optional callback which gets called from the worker thread
+                with the success of the upload
+
+        """
+        item = (filename, frame, done)
+
+        try:
+            self.queue.put_nowait(item)
+        except Full:
+            self.logger.warning(
+                "Upload queue is full. Waiting for pending uploads"
+            )
+
+            start = time.monotonic()
+            self.queue.put(item)
+
+            with self._lock:
+                self.blocked += 1
+                self.blocked_time += time.monotonic() - start
+
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def stats(self) -> dict:
+        """Get metrics of the upload stage.
+
+        Returns:
+            A dictionary of counters and the current queue depth
+        """
+        with self._lock:
+            return {
+                "depth": self.queue.qsize(),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "uploaded": self.uploaded,
+                "failed": self.failed,
+                "blocked": self.blocked,
+                "blocked_time": self.blocked_time,
+            }
+
+    def flush(self):
+        """Wait until all queued frames have been processed."""
+        self.queue.join()
+
+    def stop(self):
+        """Upload all queued frames and stop the worker threads."""
+        for _ in self.workers:
+            self.queue.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+    def _run(self):
+        while (item := self.queue.get()) is not None:
+            filename, frame, done = item
+
+            try:
+                self._upload(filename, frame)
+                ok = True
+
+                with self._lock:
+                    self.uploaded += 1
+            except Exception as e:
+                self.logger.error("Failed to upload %s: %s", filename, e)
+                ok = False
+
+                with self._lock:
+                    self.failed += 1
+
+            try:
+                if done is not None:
+                    done(ok)
+            except Exception as e:
+                self.logger.error("Upload callback failed: %s", e)
+            finally:
+                self.queue.task_done()
+
+        self.queue.task_done()
+
+    def _upload(self, filename: str, frame: FrameBuilder):
+        self.logger.info(
+            "Writing frame object containing %d samples", len(frame)
+        )
+
+        self.store.put_frame(filename, frame.to_frame())
@@ -7,8 +7,7 @@ import logging
 import time
 
 import environ
-
-from villas.node.formats import Sample
+import numpy as np
 
 from seguro.common import broker, config
 
@@ -17,6 +16,38 @@ env = environ.Env()
 TOPIC = env.str("TOPIC", "data/measurements/+/+/+")
 CONNECTOR_ID = env.str("CONNECTOR_ID", "sample-aggregator")
 
+# Aggregated samples are published in batches if larger than one
+BATCH_SIZE = env.int("BATCH_SIZE", 1)
+BATCH_LINGER = env.float("BATCH_LINGER", 1.0)
+
+
+def aggregate(data: np.ndarray) -> np.ndarray:
+    """Aggregate the currents and powers of all groups of a sample.
+
+    The first three values are always the voltages. They are followed by
+    groups of three currents and three powers. The last value is the
+    frequency.
+
+    Args:
+      data: The values of the sample
+
+    Returns:
+        The voltages, the aggregated currents and powers and the frequency
+    """
+    data = data.copy()
+
+    # Note: This currently does not aggregate incomplete groups.
+    # I.e., at least 3 currents and 3 powers have to be present.
+    if len(data) >= 16:
+        data[4:10] = np.cumsum(data[3:10])[1:]
+
+        groups = (len(data) - 16) // 6
+        if groups > 0:
+            end = 15 + 6 * groups
+            data[4:10] += data[15:end].reshape(-1, 6).sum(0)
+
+    return np.append(data[:10], data[-1])
+
 
 def main() -> int:
 
@@ -39,60 +70,50 @@ def main() -> int:
     )
 
     def callback(
+        publisher: broker.Client | broker.BatchPublisher,
         b: broker.Client,
         topic: str,
-        samples: list[Sample],
+        block: broker.SampleBlock,
     ):
         """Callback which gets called for each received MQTT message.
 
         Args:
+            publisher: The client or batch publisher for aggregated samples
             client: The broker client
-            msg: The MQTT message
+            topic: The MQTT topic
+            block: The received samples
 
         """
-        logging.debug(
-            "%s, %s - %s - %s%s",
-            samples[-1].ts_origin.seconds,
-            samples[-1].ts_origin.nanoseconds,
-            topic,
-            samples[-1].data,
-            samples[-1],
-        )
+        last = block[-1:]
+        data = last.values[0, : last.length[0]]
 
-        sample_index = 1
-        sample_start = 3  # First three elements are always the voltages
-        sample_end = len(samples[-1].data) - 1
-        curr_end = sample_start + 12
+        logging.debug("%s - %s - %s", last.ts_origin[0], topic, data)
 
-        while curr_end <= sample_end:
-            # Note: This currently does not send incomplete samples.
-            # I.e., at least 3 Currents and 3 Power values have to be present.
-            sample_range = list(range(sample_start, curr_end))
+        aggregated = aggregate(data)
 
-            samples[-1].data[4] += samples[-1].data[sample_range[0]]
-            samples[-1].data[5] += samples[-1].data[sample_range[1]]
-            samples[-1].data[6] += samples[-1].data[sample_range[2]]
+        logging.debug("Aggregated sample data: %s", aggregated)
 
-            samples[-1].data[7] += samples[-1].data[sample_range[3]]
-            samples[-1].data[8] += samples[-1].data[sample_range[4]]
-            samples[-1].data[9] += samples[-1].data[sample_range[5]]
-
-            sample_start = curr_end
-            curr_end += 6
-            sample_index += 1
+        last.values = aggregated[np.newaxis]
+        last.length = np.array([len(aggregated)])
+        last.kinds = np.full(
+            last.values.shape, b"z" if np.iscomplexobj(aggregated) else b"f"
+        )
 
-        frequency = samples[-1].data[-1]
-        samples[-1].data = samples[-1].data[:10]  # Drop non aggregated values
-        samples[-1].data.append(frequency)  # Add frequency
+        publisher.publish_block(topic + "/aggregated", last)
 
-        logging.debug("Aggregated sample data: %s", samples[-1].data)
+    b = broker.Client(CONNECTOR_ID)
 
-        b.publish_samples(topic + "/aggregated", [samples[-1]])
+    publisher: broker.Client | broker.BatchPublisher = b
+    if BATCH_SIZE > 1:
+        publisher = broker.BatchPublisher(
+            b, max_samples=BATCH_SIZE, linger=BATCH_LINGER
+        )
 
-    b = broker.Client(CONNECTOR_ID)
+    # Replicas of a scaled job split the samples between them
+    group = broker.job_group()
 
     for topic in TOPIC.split(","):
-        b.subscribe_samples(topic, partial(callback))
+        b.subscribe_blocks(topic, partial(callback, publisher), group=group)
 
     logging.info("Subscribed to %s", TOPIC)
 
@@ -102,6 +123,9 @@ def main() -> int:
         except KeyboardInterrupt:
             break
 
+    if isinstance(publisher, broker.BatchPublisher):
+        publisher.close()
+
     return 0
 
 
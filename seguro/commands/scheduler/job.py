@@ -55,8 +55,21 @@ class Job(compose.Service):
 
             cb = functools.partial(self._handle_trigger_event, id)
 
-            watcher = self.scheduler.store.watch_async(
-                trigger.prefix, cb, event, trigger.initial
+            # Persisted indexes let triggers catch up with objects which
+            # changed while the scheduler was not running
+            index = None
+            if state_dir := self.scheduler.state_dir:
+                index = store.ObjectIndex(
+                    trigger.prefix, state_dir / self.name / f"{id}.json"
+                )
+
+            watcher = store.Watcher(
+                self.scheduler.store,
+                trigger.prefix,
+                cb,
+                event,
+                trigger.initial,
+                index,
             )
 
             self.watchers.append(watcher)
@@ -5,10 +5,17 @@ import sys
 import signal
 import logging
 import docker
+import environ
+import pathlib
 import seguro.common.store as store
 
 from seguro.commands.scheduler.scheduler import Scheduler
 
+env = environ.Env()
+
+# Directory in which the scheduler keeps state across restarts
+STATE_DIR = env.str("STATE_DIR", "")
+
 
 def main() -> int:
     logging.basicConfig(
@@ -20,7 +27,9 @@ def main() -> int:
     store_client = store.Client()
     docker_client = docker.from_env()
 
-    scheduler = Scheduler(docker_client, store_client)
+    state_dir = pathlib.Path(STATE_DIR) if STATE_DIR else None
+
+    scheduler = Scheduler(docker_client, store_client, state_dir)
 
     def signal_handler(signum: int, frame):
         """Callback which gets called for received signals
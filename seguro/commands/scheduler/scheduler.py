@@ -6,6 +6,7 @@ import schedule
 import time
 import logging
 import os.path
+import pathlib
 import threading
 import slugify
 import yaml
@@ -16,12 +17,16 @@ from seguro.commands.scheduler import job, compose, model
 
 class Scheduler(compose.Composer):
     def __init__(
-        self, docker_client: docker.DockerClient, store_client: store.Client
+        self,
+        docker_client: docker.DockerClient,
+        store_client: store.Client,
+        state_dir: pathlib.Path | None = None,
     ):
         super().__init__("scheduler")
 
         self.docker = docker_client
         self.store = store_client
+        self.state_dir = state_dir
         self.scheduler = schedule.Scheduler()
         self._stopflag = threading.Event()
         self.logger = logging.getLogger(__name__)
@@ -56,8 +61,9 @@ class Scheduler(compose.Composer):
         job_name = slugify.slugify(name)
 
         if event == store.Event.CREATED:
-            file = self.store.get_file_contents(objname)
-            job_spec_dict = yaml.load(file, yaml.SafeLoader)
+            job_spec_dict = self.store.get_cached_contents(
+                objname, yaml.safe_load
+            )
 
             try:
                 job_spec = model.JobSpec(**job_spec_dict)
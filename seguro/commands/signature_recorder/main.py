@@ -3,10 +3,10 @@
 
 import logging
 import sys
+import time
 import argparse
-from io import BytesIO
 from dataclasses import dataclass
-from queue import Queue
+from queue import Queue, Empty
 from pyasn1.codec import der
 from rfc3161ng import TimeStampResp, oid_to_hash
 
@@ -38,11 +38,58 @@ class TSRMessage:
         digest: bytes = imprint["hashedMessage"].asOctets()
         return TSRMessage(algorithm, digest, tsr, msg.payload)
 
+    @property
+    def object_name(self) -> str:
+        digest_hex = self.digest.hex().upper()
+        return f"data/signatures/tsr/{digest_hex}.{self.algorithm}.tsr"
+
+
+def store_tsrs(
+    s: store.Client, batch: list[TSRMessage]
+) -> list[tuple[TSRMessage, Exception]]:
+    """Upload a batch of TSRs concurrently.
+
+    Args:
+      s: The store client
+      batch: The TSR messages
+
+    Returns:
+        The TSR messages which failed to upload and their errors
+    """
+    objects = {}
+    for m in batch:
+        logging.info(
+            f"Received TSR for {m.algorithm}:{m.digest.hex().upper()}"
+        )
+        objects[m.object_name] = m
+
+    failed = []
+    for res in s.put_many({obj: m.payload for obj, m in objects.items()}):
+        if res.error is not None:
+            logging.error(f"Failed to store TSR {res.filename}: {res.error}")
+            failed.append((objects[res.filename], res.error))
+
+    return failed
+
 
 def main() -> int:
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-t", "--topic", type=str, default="signatures/tsr")
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=32,
+        help="Maximum number of TSRs which are uploaded concurrently",
+    )
+    parser.add_argument(
+        "-r",
+        "--retries",
+        type=int,
+        default=5,
+        help="Number of retries of failed uploads before exiting",
+    )
     parser.add_argument(
         "-l",
         "--log-level",
@@ -78,18 +125,45 @@ def main() -> int:
 
     b.subscribe(args.topic, tsr_callback)
 
-    msg: TSRMessage
-    while (msg := queue.get()) is not None:
-        algorithm = msg.algorithm
-        digest_hex = msg.digest.hex().upper()
-        logging.info(f"Received TSR for {algorithm}:{digest_hex}")
-
-        s.client.put_object(
-            bucket_name=s.bucket,
-            object_name=f"data/signatures/tsr/{digest_hex}.{algorithm}.tsr",
-            data=BytesIO(msg.payload),
-            length=len(msg.payload),
-        )
+    # Failed uploads are retried with the next batch
+    retry: list[TSRMessage] = []
+    attempts = 0
+
+    msg: TSRMessage | None = None
+    while True:
+        # Upload all TSRs which arrived in the meantime as one batch
+        if retry:
+            batch = retry
+        elif (msg := queue.get()) is not None:
+            batch = [msg]
+        else:
+            break
+
+        while len(batch) < args.batch_size:
+            try:
+                msg = queue.get_nowait()
+            except Empty:
+                break
+
+            if msg is None:
+                break
+
+            batch.append(msg)
+
+        failed = store_tsrs(s, batch)
+        if failed:
+            attempts += 1
+            if attempts > args.retries:
+                raise failed[0][1]
+
+            retry = [m for m, _ in failed]
+            time.sleep(2**attempts)
+        else:
+            retry = []
+            attempts = 0
+
+        if msg is None and not retry:
+            break
 
     return 0
 
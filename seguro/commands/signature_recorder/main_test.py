@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Iterable
+
+from rfc3161ng import TimeStampResp
+
+from seguro.common.store import PutResult
+from seguro.commands.signature_recorder.main import TSRMessage, store_tsrs
+
+
+class Store:
+    def __init__(self, failing: set[str]):
+        self.failing = failing
+        self.objects: dict[str, bytes] = {}
+
+    def put_many(self, objects: dict[str, bytes]) -> Iterable[PutResult]:
+        for filename, content in objects.items():
+            if filename in self.failing:
+                yield PutResult(filename, error=OSError("Upload failed"))
+            else:
+                self.objects[filename] = content
+                yield PutResult(filename)
+
+
+def tsr(digest: bytes) -> TSRMessage:
+    return TSRMessage("sha256", digest, TimeStampResp(), b"tsr" + digest)
+
+
+def test_store_tsrs():
+    batch = [tsr(b"\x01"), tsr(b"\x02"), tsr(b"\x03")]
+    s = Store({batch[1].object_name})
+
+    failed = store_tsrs(s, batch)  # type: ignore[arg-type]
+
+    # Failed TSRs are returned to be retried
+    assert [m for m, _ in failed] == [batch[1]]
+    assert isinstance(failed[0][1], OSError)
+
+    assert s.objects == {
+        "data/signatures/tsr/01.sha256.tsr": b"tsr\x01",
+        "data/signatures/tsr/03.sha256.tsr": b"tsr\x03",
+    }
+
+    s.failing.clear()
+    retry = [m for m, _ in failed]
+    assert store_tsrs(s, retry) == []  # type: ignore[arg-type]
+    assert len(s.objects) == 3
@@ -2,19 +2,658 @@
 # SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
 # SPDX-License-Identifier: Apache-2.0
 
+import re
+import ssl
+import time
 import uuid
+import zlib
+import random
+import asyncio
 import logging
+import threading
+import functools as ft
 
-from typing import Callable, Iterable
+from enum import Enum
+from queue import Queue, Full
+from collections import deque, OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Iterable, TypeAlias
 
+import numpy as np
 import paho.mqtt.client as mqtt
+import villas.node.villas_pb2 as pb
 from paho.mqtt.client import PayloadType, MQTTMessageInfo
 from villas.node.sample import Sample, Timestamp  # noqa: F401
 from villas.node.formats import Protobuf
 
 from seguro.common import config
 
-Message = mqtt.MQTTMessage
+Message: TypeAlias = mqtt.MQTTMessage
+
+
+@dataclass
+class SampleBlock:
+    """Block of samples backed by NumPy arrays
+
+    Attributes:
+      ts_origin: Origin timestamps (datetime64[ns], NaT if missing)
+      ts_received: Receive timestamps (datetime64[ns], NaT if missing)
+      sequence: Sequence numbers (int64, -1 if missing)
+      new_frame: New frame flags (bool)
+      values: Signal values with one row per sample (float64 or complex128
+              if any value is complex). Missing values are NaN.
+      length: Number of values of each sample
+      kinds: Type of each value as the name of its Protobuf field (b"f",
+             b"i", b"b" or b"z", empty if missing)
+
+    Integer and boolean values are stored as floats in values. Their kind
+    restores the original type when the block is converted back.
+    """
+
+    ts_origin: np.ndarray
+    ts_received: np.ndarray
+    sequence: np.ndarray
+    new_frame: np.ndarray
+    values: np.ndarray
+    length: np.ndarray
+    kinds: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, rows: slice) -> "SampleBlock":
+        return SampleBlock(
+            self.ts_origin[rows],
+            self.ts_received[rows],
+            self.sequence[rows],
+            self.new_frame[rows],
+            self.values[rows],
+            self.length[rows],
+            self.kinds[rows],
+        )
+
+    @classmethod
+    def empty(cls, rows: int, cols: int, dtype=np.float64) -> "SampleBlock":
+        return cls(
+            ts_origin=np.full(rows, np.datetime64("NaT"), "datetime64[ns]"),
+            ts_received=np.full(rows, np.datetime64("NaT"), "datetime64[ns]"),
+            sequence=np.full(rows, -1, dtype=np.int64),
+            new_frame=np.zeros(rows, dtype=bool),
+            values=np.full((rows, cols), np.nan, dtype=dtype),
+            length=np.zeros(rows, dtype=np.int64),
+            kinds=np.zeros((rows, cols), dtype="S1"),
+        )
+
+    @classmethod
+    def from_samples(cls, samples: list[Sample]) -> "SampleBlock":
+        """Convert a list of samples into a block.
+
+        Args:
+          samples: The samples
+
+        Returns:
+            The block
+        """
+        cols = max((len(sample.data) for sample in samples), default=0)
+        dtype = (
+            np.complex128
+            if any(isinstance(v, complex) for s in samples for v in s.data)
+            else np.float64
+        )
+
+        block = cls.empty(len(samples), cols, dtype)
+
+        for i, sample in enumerate(samples):
+            if sample.ts_origin is not None:
+                block.ts_origin[i] = _to_datetime64(sample.ts_origin)
+            if sample.ts_received is not None:
+                block.ts_received[i] = _to_datetime64(sample.ts_received)
+            if sample.sequence is not None:
+                block.sequence[i] = sample.sequence
+
+            block.new_frame[i] = sample.new_frame
+            block.values[i, : len(sample.data)] = sample.data
+            block.kinds[i, : len(sample.data)] = [
+                _kind(v) for v in sample.data
+            ]
+            block.length[i] = len(sample.data)
+
+        return block
+
+    def to_samples(self) -> list[Sample]:
+        """Convert the block into a list of samples.
+
+        Returns:
+            The samples
+        """
+        return [
+            Sample(
+                ts_origin=_to_timestamp(self.ts_origin[i]),
+                ts_received=_to_timestamp(self.ts_received[i]),
+                sequence=(
+                    int(self.sequence[i]) if self.sequence[i] >= 0 else None
+                ),
+                new_frame=bool(self.new_frame[i]),
+                data=[
+                    _CONVERTERS[kind](value)
+                    for value, kind in zip(
+                        self.values[i, : self.length[i]].tolist(),
+                        self.kinds[i, : self.length[i]].tolist(),
+                    )
+                ],
+            )
+            for i in range(len(self))
+        ]
+
+    @classmethod
+    def from_protobuf(cls, payload: bytes) -> "SampleBlock":
+        """Decode a Protobuf message directly into a block.
+
+        Unlike Protobuf.loadb() no intermediate Sample objects are created.
+
+        Args:
+          payload: The Protobuf encoded message
+
+        Returns:
+            The block
+        """
+        msg = pb.Message()
+        msg.ParseFromString(payload)
+
+        samples = msg.samples
+        cols = max((len(sample.values) for sample in samples), default=0)
+
+        block = cls.empty(len(samples), cols)
+
+        # Timestamps are collected as integers in nanoseconds
+        ts_origin = block.ts_origin.view(np.int64)
+        ts_received = block.ts_received.view(np.int64)
+
+        for i, sample in enumerate(samples):
+            if sample.HasField("ts_origin"):
+                ts = sample.ts_origin
+                ts_origin[i] = ts.sec * 1_000_000_000 + ts.nsec
+
+            if sample.HasField("ts_received"):
+                ts = sample.ts_received
+                ts_received[i] = ts.sec * 1_000_000_000 + ts.nsec
+
+            if sample.HasField("sequence"):
+                block.sequence[i] = sample.sequence
+
+            block.new_frame[i] = sample.new_frame
+            block.length[i] = len(sample.values)
+
+            row = block.values[i]
+            kinds = block.kinds[i]
+            for j, value in enumerate(sample.values):
+                kind = value.WhichOneof("value")
+                if kind == "z":
+                    if block.values.dtype != np.complex128:
+                        block.values = block.values.astype(np.complex128)
+                        row = block.values[i]
+
+                    row[j] = complex(value.z.real, value.z.imag)
+                elif kind is not None:
+                    row[j] = getattr(value, kind)
+
+                if kind is not None:
+                    kinds[j] = kind.encode()
+
+        return block
+
+    def to_protobuf(self) -> bytes:
+        """Encode the block as a Protobuf message.
+
+        Returns:
+            The Protobuf encoded message
+        """
+        msg = pb.Message()
+
+        ts_origin = self.ts_origin.astype("datetime64[ns]").view(np.int64)
+        ts_received = self.ts_received.astype("datetime64[ns]").view(np.int64)
+        nat = np.iinfo(np.int64).min
+
+        for i in range(len(self)):
+            sample = msg.samples.add()
+            sample.type = pb.Sample.Type.DATA
+            sample.new_frame = bool(self.new_frame[i])
+
+            if ts_origin[i] != nat:
+                sec, nsec = divmod(int(ts_origin[i]), 1_000_000_000)
+                sample.ts_origin.sec = sec
+                sample.ts_origin.nsec = nsec
+
+            if ts_received[i] != nat:
+                sec, nsec = divmod(int(ts_received[i]), 1_000_000_000)
+                sample.ts_received.sec = sec
+                sample.ts_received.nsec = nsec
+
+            if self.sequence[i] >= 0:
+                sample.sequence = int(self.sequence[i])
+
+            for value, kind in zip(
+                self.values[i, : self.length[i]].tolist(),
+                self.kinds[i, : self.length[i]].tolist(),
+            ):
+                pb_value = sample.values.add()
+                value = _CONVERTERS[kind](value)
+                if kind == b"z":
+                    pb_value.z.real = value.real
+                    pb_value.z.imag = value.imag
+                elif kind:
+                    setattr(pb_value, kind.decode(), value)
+
+        return msg.SerializeToString()
+
+
+# Convert a value of a block back to the Python type of its kind
+_CONVERTERS: dict[bytes, Callable[[Any], Any]] = {
+    b"f": lambda v: float(v.real),
+    b"i": lambda v: int(v.real),
+    b"b": lambda v: bool(v.real),
+    b"z": complex,
+    b"": lambda v: v,
+}
+
+
+def _kind(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return b"b"
+    elif isinstance(value, int):
+        return b"i"
+    elif isinstance(value, complex):
+        return b"z"
+    else:
+        return b"f"
+
+
+def _to_datetime64(ts: Timestamp) -> np.datetime64:
+    return np.datetime64(ts.seconds * 1_000_000_000 + ts.nanoseconds, "ns")
+
+
+def _to_timestamp(ts: np.datetime64) -> Timestamp | None:
+    if np.isnat(ts):
+        return None
+
+    ns = int(ts.astype("datetime64[ns]").astype(np.int64))
+    return Timestamp(*divmod(ns, 1_000_000_000))
+
+
+def _create_client(
+    uid: str | None,
+    tls_cert: str,
+    tls_key: str,
+    tls_cacert: str,
+    persistent: bool = False,
+    max_inflight: int = 20,
+    max_queued: int = 0,
+) -> mqtt.Client:
+    if persistent:
+        if uid is None:
+            raise ValueError("Persistent sessions require a client id")
+    elif uid is None:
+        # Create uid based onMAC address and time component
+        uid = str(uuid.uuid1())
+    else:
+        uid += "/" + str(uuid.uuid1())
+
+    client = mqtt.Client(
+        client_id=uid,
+        clean_session=not persistent,
+        callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+    )
+    client.tls_set(
+        ca_certs=tls_cacert,
+        certfile=tls_cert,
+        keyfile=tls_key,
+    )
+
+    client.max_inflight_messages_set(max_inflight)
+    client.max_queued_messages_set(max_queued)
+
+    return client
+
+
+def job_group() -> str | None:
+    """Get the consumer group for shared subscriptions of the current job.
+
+    All replicas of a scaled job share the same group.
+
+    Returns:
+        The name of the job or None if not running as a job
+    """
+    # Avoid importing the scheduler models unless needed
+    from seguro.common import job
+
+    if job.info is None:
+        return None
+
+    return re.sub(r"[/+#]", "_", job.info.name)
+
+
+def _shared(topic: str, group: str | None) -> str:
+    return topic if group is None else f"$share/{group}/{topic}"
+
+
+Route = Callable[[Message], None]
+
+
+class _TopicNode:
+    __slots__ = ("children", "route")
+
+    def __init__(self):
+        self.children: dict[str, _TopicNode] = {}
+        self.route: Route | None = None
+
+
+class TopicRouter:
+    """Finds the callbacks of all topic filters which match a topic.
+
+    Filters are kept in a trie of their topic levels. A topic is matched
+    level by level including the '+' and '#' wildcards. Hence, the time
+    taken depends on the depth of the topic rather than the number of
+    filters. The callbacks of recently matched topics are cached.
+
+    Args:
+      cache_size: Maximum number of topics whose callbacks are cached
+
+    """
+
+    def __init__(self, cache_size: int = 10000):
+        self.cache_size = cache_size
+
+        self._root = _TopicNode()
+        self._cache: OrderedDict[str, tuple[Route, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def insert(self, topic_filter: str, route: Route):
+        """Add a topic filter or replace the callback of an existing one.
+
+        Args:
+          topic_filter: The topic filter
+          route: The callback for matching messages
+
+        """
+        with self._lock:
+            node = self._root
+            for level in topic_filter.split("/"):
+                node = node.children.setdefault(level, _TopicNode())
+
+            node.route = route
+            self._cache.clear()
+
+    def remove(self, topic_filter: str):
+        """Remove a topic filter.
+
+        Args:
+          topic_filter: The topic filter
+
+        """
+        with self._lock:
+            levels = topic_filter.split("/")
+
+            path = [self._root]
+            for level in levels:
+                child = path[-1].children.get(level)
+                if child is None:
+                    return
+
+                path.append(child)
+
+            node = path[-1]
+            node.route = None
+
+            # Prune branches without any filters
+            for level, parent in zip(reversed(levels), reversed(path[:-1])):
+                if node.route is not None or node.children:
+                    break
+
+                del parent.children[level]
+                node = parent
+
+            self._cache.clear()
+
+    def match(self, topic: str) -> tuple[Route, ...]:
+        """Get the callbacks of all filters which match a topic.
+
+        Args:
+          topic: The topic of a message
+
+        Returns:
+            The callbacks
+        """
+        with self._lock:
+            routes = self._cache.get(topic)
+            if routes is not None:
+                self._cache.move_to_end(topic)
+                return routes
+
+            routes = self._match(topic)
+
+            self._cache[topic] = routes
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+            return routes
+
+    def _match(self, topic: str) -> tuple[Route, ...]:
+        routes: list[Route] = []
+        nodes = [self._root]
+
+        # Wildcards do not match the first level of topics starting with $
+        wildcards = not topic.startswith("$")
+
+        for level in topic.split("/"):
+            children = []
+            for node in nodes:
+                if child := node.children.get(level):
+                    children.append(child)
+
+                if not wildcards:
+                    continue
+
+                if child := node.children.get("+"):
+                    children.append(child)
+
+                if (child := node.children.get("#")) and child.route:
+                    routes.append(child.route)
+
+            nodes = children
+            wildcards = True
+
+            if not nodes:
+                break
+
+        for node in nodes:
+            if node.route:
+                routes.append(node.route)
+
+            # "a/#" also matches "a"
+            if (child := node.children.get("#")) and child.route:
+                routes.append(child.route)
+
+        return tuple(routes)
+
+
+class Overflow(Enum):
+    """Behaviour of a dispatcher if the queue of a lane is full.
+
+    BLOCK: Wait for free space and thereby apply back-pressure to the broker
+    DROP:  Discard the message
+    """
+
+    BLOCK = "block"
+    DROP = "drop"
+
+
+class Dispatcher:
+    """Runs the callbacks of subscriptions off the network thread.
+
+    Messages are distributed to a number of lanes by a hash of their topic
+    and the subscription they belong to. Each lane consists of a bounded
+    queue and a worker thread. Hence, messages of the same topic are
+    processed in the order of their reception while a slow callback only
+    stalls the topics of its own lane. A single dispatcher is shared by all
+    subscriptions of a client.
+
+    Args:
+      cb: The callback which is called for messages submitted without one
+      name: Name of the worker threads
+      workers: Number of lanes
+      queue_size: Maximum number of messages waiting in each lane
+      overflow: Behaviour if the queue of a lane is full
+
+    """
+
+    def __init__(
+        self,
+        cb: Callable[[Message], None] | None = None,
+        name: str = "dispatcher",
+        workers: int = 1,
+        queue_size: int = 1000,
+        overflow: Overflow = Overflow.BLOCK,
+    ):
+        self.cb = cb
+        self.overflow = overflow
+        self.logger = logging.getLogger(__name__)
+
+        self.queues: list[Queue[tuple[Callable, Message] | None]] = [
+            Queue(queue_size) for _ in range(workers)
+        ]
+
+        # Lane which is stopped without a sentinel, see stop()
+        self._drain: Queue | None = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.dispatched = 0
+        self.failed = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.max_depth = 0
+
+        self.workers = [
+            threading.Thread(
+                target=self._run,
+                args=(queue,),
+                name=f"{name}-{i}",
+                daemon=True,
+            )
+            for i, queue in enumerate(self.queues)
+        ]
+
+        for worker in self.workers:
+            worker.start()
+
+    def submit(
+        self,
+        msg: Message,
+        cb: Callable[[Message], None] | None = None,
+        lane: str = "",
+    ):
+        """Queue a message in the lane of its topic.
+
+        Args:
+          msg: The MQTT message
+          cb: The callback which is called for the message. Defaults to the
+              one of the dispatcher.
+          lane: Key which is hashed together with the topic to select the
+                lane, e.g. the filter of the subscription
+
+        """
+        cb = cb or self.cb
+        if cb is None:
+            raise ValueError("No callback for message")
+
+        crc = zlib.crc32(msg.topic.encode(), zlib.crc32(lane.encode()))
+        queue = self.queues[crc % len(self.queues)]
+        item = (cb, msg)
+
+        try:
+            queue.put_nowait(item)
+        except Full:
+            if self.overflow == Overflow.DROP:
+                with self._lock:
+                    self.dropped += 1
+                return
+
+            start = time.monotonic()
+            queue.put(item)
+
+            with self._lock:
+                self.blocked += 1
+                self.blocked_time += time.monotonic() - start
+
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, queue.qsize())
+
+    def stats(self) -> dict:
+        """Get metrics of the dispatcher.
+
+        Returns:
+            A dictionary of counters and the current depth of each lane
+        """
+        with self._lock:
+            return {
+                "depth": [queue.qsize() for queue in self.queues],
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "dispatched": self.dispatched,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "blocked_time": self.blocked_time,
+            }
+
+    def stop(self):
+        """Process all queued messages and stop the worker threads.
+
+        If called from a callback, the worker threads are not joined as the
+        calling one would wait for itself. Its lane might be full, so it is
+        drained without a sentinel once the callback returned.
+        """
+        current = threading.current_thread()
+
+        for queue, worker in zip(self.queues, self.workers):
+            if worker is current:
+                self._drain = queue
+            else:
+                queue.put(None)
+
+        if current in self.workers:
+            return
+
+        for worker in self.workers:
+            worker.join()
+
+    def _run(self, queue: Queue[tuple[Callable, Message] | None]):
+        while (item := queue.get()) is not None:
+            cb, msg = item
+            try:
+                cb(msg)
+
+                with self._lock:
+                    self.dispatched += 1
+            except Exception:
+                self.logger.exception("Callback failed for %s", msg.topic)
+
+                with self._lock:
+                    self.failed += 1
+
+            if queue is self._drain and queue.empty():
+                break
+
+
+class BufferedMessageInfo(MQTTMessageInfo):
+    """Information of a QoS 0 message which is buffered while disconnected.
+
+    Like paho does for queued messages with a higher QoS, its rc is
+    MQTT_ERR_NO_CONN. The message is sent once the connection has been
+    re-established unless newer messages overflow the buffer before.
+    """
 
 
 class Client:
@@ -37,6 +676,30 @@ class Client:
       tls_cacert: File containing the TLS certificate authority to validate
                   the servers certificate against.
       keepalive: The keepalive interval in seconds.
+      workers: Number of threads which run the callbacks of all
+               subscriptions. If zero, callbacks are run on the network
+               thread.
+      queue_size: Maximum number of messages waiting in each lane of the
+                  dispatcher
+      overflow: Behaviour if the queue of a lane is full
+      qos: The default quality of service level of subscriptions and
+           publications
+      persistent: Use the uid as a stable client id and resume the session
+                  of a previous connection. The broker keeps subscriptions
+                  and queues messages with QoS > 0 while disconnected.
+      max_inflight: Maximum number of QoS > 0 messages which are sent but
+                    not yet acknowledged
+      max_queued: Maximum number of outgoing messages waiting to be sent
+                  (0 for unlimited)
+      min_backoff: Initial delay in whole seconds before reconnecting
+      max_backoff: Maximum delay in whole seconds before reconnecting
+      buffer_size: Maximum size in bytes of QoS 0 messages which are kept
+                   while disconnected. The oldest ones are dropped first.
+
+    A lost connection is re-established with exponential backoff. The
+    initial delay is randomized so that clients do not reconnect in
+    lockstep after a restart of the broker. All subscriptions are restored
+    afterwards.
 
     """
 
@@ -49,23 +712,66 @@ class Client:
         tls_key: str = config.TLS_KEY,
         tls_cacert: str = config.TLS_CACERT,
         keepalive=60,
+        workers: int = 0,
+        queue_size: int = 1000,
+        overflow: Overflow = Overflow.BLOCK,
+        qos: int = 0,
+        persistent: bool = False,
+        max_inflight: int = 20,
+        max_queued: int = 0,
+        min_backoff: int = 2,
+        max_backoff: int = 60,
+        buffer_size: int = 16 * 1024 * 1024,
     ):
-        # Create uid based onMAC address and time component
-        if uid is None:
-            uid = str(uuid.uuid1())
-        else:
-            uid += "/" + str(uuid.uuid1())
-
         self.logger = logging.getLogger(__name__)
-        self.client = mqtt.Client(
-            client_id=uid,
-            callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
-        )
-        self.client.tls_set(
-            ca_certs=tls_cacert,
-            certfile=tls_cert,
-            keyfile=tls_key,
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.qos = qos
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.buffer_size = buffer_size
+        self.dispatcher: Dispatcher | None = None
+
+        # Subscribed topics and their QoS which are restored after reconnects
+        self._subscriptions: dict[str, int] = {}
+
+        # QoS 0 messages published while disconnected and their total size.
+        # Messages with a higher QoS are queued by paho itself.
+        self._buffer: deque[tuple[str, PayloadType, int]] = deque()
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+
+        self.connected = False
+        self.disconnects = 0
+        self.dropped = 0
+
+        # The formatter is stateless and reused for all messages
+        self.formatter = Protobuf()
+
+        # Callbacks of all subscriptions by topic filter
+        self.router = TopicRouter()
+
+        # Messages of a resumed session may arrive before the subscriptions
+        # have been restored by the application. They are kept until then.
+        self.persistent = persistent
+        self._unmatched: deque[Message] = deque(maxlen=queue_size)
+        self._lock = threading.RLock()
+
+        self.client = _create_client(
+            uid,
+            tls_cert,
+            tls_key,
+            tls_cacert,
+            persistent,
+            max_inflight,
+            max_queued,
         )
+        self.client.on_message = self._on_message
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.reconnect_delay_set(min_backoff, max_backoff)
 
         self.client.connect(host, port, keepalive)
 
@@ -78,74 +784,883 @@ class Client:
         self,
         topic,
         cb: Callable[["Client", mqtt.MQTTMessage], None],
+        qos: int | None = None,
+        group: str | None = None,
     ):
         """Subscribe client to given topic and registering callback (optional).
 
+        If the client has been created with workers, the callback is run by
+        the dispatcher of the client instead of the network thread.
+
         Args:
           topic: The topic that is subscribed
           callback: A callback func that is called on message reception
+          qos: The maximum quality of service level. Defaults to the one of
+               the client.
+          group: Share the subscription with other clients of this group.
+                 Each message is only delivered to one of them.
+                 See job_group().
 
         """
-        self.client.subscribe(topic)
 
-        def callback(_client, _ctx, msg):
+        def dispatch(msg: mqtt.MQTTMessage):
             self.logger.debug("Recv msg: %s - %s", msg.topic, msg.payload)
             cb(self, msg)
 
-        self.client.message_callback_add(topic, callback)
+        def submit(msg: mqtt.MQTTMessage):
+            if (dispatcher := self.dispatcher) is not None:
+                dispatcher.submit(msg, dispatch, lane=topic)
+            else:
+                dispatch(msg)
+
+        qos = self.qos if qos is None else qos
+
+        self.client.subscribe(_shared(topic, group), qos)
+
+        with self._lock:
+            self._subscriptions[_shared(topic, group)] = qos
+            self.router.insert(topic, submit)
+
+            # Deliver messages of a resumed session which arrived early
+            for msg in list(self._unmatched):
+                if mqtt.topic_matches_sub(topic, msg.topic):
+                    self._unmatched.remove(msg)
+                    submit(msg)
+
         self.logger.debug("Subscribed to %s with callback-func %s", topic, cb)
 
     def start_listening(self):
         """Start async listening on subscribed topics."""
+        if self.workers > 0 and self.dispatcher is None:
+            self.dispatcher = Dispatcher(
+                workers=self.workers,
+                queue_size=self.queue_size,
+                overflow=self.overflow,
+            )
+
         self.client.loop_start()
 
     def stop_listening(self):
-        """Stop async listening on subscribed topics."""
+        """Stop async listening on subscribed topics.
+
+        Messages which are already queued by dispatchers are processed
+        before this returns.
+        """
         self.client.loop_stop()
 
-    def publish(self, topic: str, message: PayloadType) -> MQTTMessageInfo:
+        dispatcher, self.dispatcher = self.dispatcher, None
+        if dispatcher is not None:
+            dispatcher.stop()
+
+    def stats(self) -> dict:
+        """Get metrics of the connection and the dispatchers.
+
+        Returns:
+            A dictionary of the connection state, counters and the
+            dispatcher metrics
+        """
+        with self._buffer_lock:
+            buffered = len(self._buffer)
+
+        dispatcher = self.dispatcher
+
+        return {
+            "connected": self.connected,
+            "disconnects": self.disconnects,
+            "buffered": buffered,
+            "dropped": self.dropped,
+            "dispatcher": dispatcher.stats() if dispatcher else None,
+        }
+
+    def publish(
+        self, topic: str, message: PayloadType, qos: int | None = None
+    ) -> MQTTMessageInfo:
         """Publish message to given topic
 
         Args:
           topic:
           message:
+          qos: The quality of service level. Defaults to the one of the
+               client.
 
         Returns:
-            MQTTMessageInfo: The MQTT message information
+            MQTTMessageInfo: The MQTT message information. QoS 0 messages
+            which are published while disconnected return a
+            BufferedMessageInfo, or an info with rc MQTT_ERR_QUEUE_SIZE if
+            they are larger than the buffer.
 
         """
         self.logger.debug("Send msg: %s - %s", topic, message)
 
-        return self.client.publish(topic, message)
+        qos = self.qos if qos is None else qos
+
+        with self._buffer_lock:
+            # Messages are not overtaking buffered ones
+            if qos > 0 or not self._buffer:
+                info = self.client.publish(topic, message, qos)
+                if qos > 0 or info.rc != mqtt.MQTT_ERR_NO_CONN:
+                    return info
+
+            if self._buffer_message(topic, message):
+                info = BufferedMessageInfo(0)
+                info.rc = mqtt.MQTT_ERR_NO_CONN
+            else:
+                info = MQTTMessageInfo(0)
+                info.rc = mqtt.MQTT_ERR_QUEUE_SIZE
+
+        return info
 
     def subscribe_samples(
-        self, topic: str, cb: Callable[["Client", str, list[Sample]], None]
+        self,
+        topic: str,
+        cb: Callable[["Client", str, list[Sample]], None],
+        qos: int | None = None,
+        group: str | None = None,
     ):
         """Subscribe client to given topic and registering callback (optional).
 
         Args:
           topic: The topic that is subscribed
           cb: The callback func that is called for each received sample
+          qos: The maximum quality of service level
+          group: The group with which the subscription is shared
 
         """
 
         def on_message(client: "Client", msg: mqtt.MQTTMessage):
-            cb(client, msg.topic, Protobuf().loadb(msg.payload))
+            cb(client, msg.topic, self.formatter.loadb(msg.payload))
 
-        self.subscribe(topic, on_message)
+        self.subscribe(topic, on_message, qos, group)
+
+    def subscribe_blocks(
+        self,
+        topic: str,
+        cb: Callable[["Client", str, SampleBlock], None],
+        qos: int | None = None,
+        group: str | None = None,
+    ):
+        """Subscribe to samples which are decoded into NumPy arrays.
+
+        Args:
+          topic: The topic that is subscribed
+          cb: The callback func that is called for each received block
+          qos: The maximum quality of service level
+          group: The group with which the subscription is shared
+
+        """
+
+        def on_message(client: "Client", msg: mqtt.MQTTMessage):
+            cb(client, msg.topic, SampleBlock.from_protobuf(msg.payload))
+
+        self.subscribe(topic, on_message, qos, group)
 
     def publish_samples(
-        self, topic, samples: Iterable[Sample]
+        self, topic, samples: Iterable[Sample], qos: int | None = None
     ) -> MQTTMessageInfo:
         """Publish sample to given topic.
 
         Args:
           topic:
           samples:
+          qos: The quality of service level
 
         Returns:
             MQTTMessageInfo: The MQTT message information
 
         """
 
-        return self.publish(topic, Protobuf().dumpb(samples))
+        return self.publish(topic, self.formatter.dumpb(samples), qos)
+
+    def publish_block(
+        self, topic: str, block: SampleBlock, qos: int | None = None
+    ) -> MQTTMessageInfo:
+        """Publish a block of samples to given topic.
+
+        Args:
+          topic: The topic
+          block: The block of samples
+          qos: The quality of service level
+
+        Returns:
+            MQTTMessageInfo: The MQTT message information
+
+        """
+        return self.publish(topic, block.to_protobuf(), qos)
+
+    def _buffer_message(self, topic: str, message: PayloadType) -> bool:
+        if isinstance(message, (bytes, bytearray, str)):
+            size = len(message)
+        else:
+            size = 8
+
+        while self._buffer and self._buffered + size > self.buffer_size:
+            _, _, dropped = self._buffer.popleft()
+            self._buffered -= dropped
+            self.dropped += 1
+
+        if size > self.buffer_size:
+            self.dropped += 1
+            return False
+
+        self._buffer.append((topic, message, size))
+        self._buffered += size
+
+        return True
+
+    def _flush(self):
+        if self._buffer:
+            self.logger.info(
+                "Publishing %d buffered messages", len(self._buffer)
+            )
+
+        while self._buffer:
+            topic, message, size = self._buffer[0]
+
+            info = self.client.publish(topic, message, 0)
+            if info.rc == mqtt.MQTT_ERR_NO_CONN:
+                break
+
+            self._buffer.popleft()
+            self._buffered -= size
+
+    def _on_connect(self, _client, _ctx, flags, reason_code, _props):
+        if reason_code.is_failure:
+            self.logger.warning("Connection refused: %s", reason_code)
+            return
+
+        self.connected = True
+
+        if self.disconnects > 0:
+            self.logger.info("Reconnected to broker")
+
+            # The broker keeps the subscriptions of a resumed session
+            with self._lock:
+                if self._subscriptions and not flags.session_present:
+                    self.client.subscribe(list(self._subscriptions.items()))
+
+        with self._buffer_lock:
+            self._flush()
+
+    def _on_disconnect(self, _client, _ctx, _flags, reason_code, _props):
+        was_connected, self.connected = self.connected, False
+
+        # Disconnects requested by us and failed reconnects
+        if not reason_code.is_failure or not was_connected:
+            return
+
+        self.disconnects += 1
+
+        # Restart the backoff with a randomized initial delay
+        delay = random.randint(max(self.min_backoff // 2, 1), self.min_backoff)
+        self.client.reconnect_delay_set(delay, self.max_backoff)
+
+        self.logger.warning(
+            "Lost connection to broker: %s. Reconnecting in %d s",
+            reason_code,
+            delay,
+        )
+
+    def _on_message(self, _client, _ctx, msg: Message):
+        routes = self.router.match(msg.topic)
+
+        if not routes and self.persistent:
+            with self._lock:
+                # The subscription might have been restored in the meantime
+                routes = self.router.match(msg.topic)
+                if not routes:
+                    self._unmatched.append(msg)
+
+        for route in routes:
+            route(msg)
+
+
+class _Batch:
+    __slots__ = ("parts", "samples", "size", "start")
+
+    def __init__(self):
+        # Runs of samples and blocks in the order they have been queued
+        self.parts: list[list[Sample] | SampleBlock] = []
+        self.samples = 0
+        self.size = 0
+        self.start = time.monotonic()
+
+    def add_sample(self, sample: Sample):
+        if self.parts and isinstance(self.parts[-1], list):
+            self.parts[-1].append(sample)
+        else:
+            self.parts.append([sample])
+
+        self.samples += 1
+        self.size += _estimate_size(sample)
+
+    def add_block(self, block: SampleBlock, size: int):
+        self.parts.append(block)
+        self.samples += len(block)
+        self.size += size
+
+
+class BatchPublisher:
+    """Coalesces samples which are published to the same topic.
+
+    Samples are accumulated per topic and published as a single message
+    once a batch reaches its maximum number of samples or size, or its
+    first sample has been waiting for longer than the linger time. Each
+    batch is encoded only once. Blocks are queued as they are and encoded
+    without converting them into samples.
+
+    Lingering batches are published by a background thread.
+
+    Args:
+      client: The broker client which publishes the batches
+      max_samples: Maximum number of samples per batch
+      max_bytes: Maximum estimated size of the encoded batch in bytes
+      linger: Maximum time in seconds a sample is kept back
+
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        max_samples: int = 100,
+        max_bytes: int = 64 * 1024,
+        linger: float = 0.1,
+    ):
+        self.client = client
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+        self.linger = linger
+
+        # Pending samples by topic
+        self._batches: dict[str, _Batch] = {}
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.batches = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="batch-publisher", daemon=True
+        )
+        self._thread.start()
+
+    def publish_samples(self, topic: str, samples: Iterable[Sample]):
+        """Queue samples for publishing to given topic.
+
+        Args:
+          topic: The topic
+          samples: The samples
+
+        """
+        full = []
+
+        with self._lock:
+            for sample in samples:
+                batch = self._batches.setdefault(topic, _Batch())
+                batch.add_sample(sample)
+
+                if self._full(batch):
+                    full.append(self._batches.pop(topic))
+
+        for batch in full:
+            self._publish(topic, batch)
+
+    def publish_block(self, topic: str, block: SampleBlock):
+        """Queue a block of samples for publishing to given topic.
+
+        The rows of the block are split between batches if necessary.
+
+        Args:
+          topic: The topic
+          block: The block of samples
+
+        """
+        sizes = _estimate_sizes(block)
+        full = []
+
+        with self._lock:
+            i = 0
+            while i < len(block):
+                batch = self._batches.setdefault(topic, _Batch())
+
+                # Number of rows until the batch is full
+                n = min(len(block) - i, self.max_samples - batch.samples)
+                end = i + n
+                total = batch.size + np.cumsum(sizes[i:end])
+                n = min(n, int(np.searchsorted(total, self.max_bytes)) + 1)
+
+                end = i + n
+                batch.add_block(block[i:end], int(total[n - 1]))
+                i += n
+
+                if self._full(batch):
+                    full.append(self._batches.pop(topic))
+
+        for batch in full:
+            self._publish(topic, batch)
+
+    def flush(self):
+        """Publish all pending samples."""
+        with self._lock:
+            batches, self._batches = self._batches, {}
+
+        for topic, batch in batches.items():
+            self._publish(topic, batch)
+
+    def close(self):
+        """Publish all pending samples and stop the background thread."""
+        self._stop.set()
+        self._thread.join()
+
+        self.flush()
+
+    def stats(self) -> dict:
+        """Get metrics of the publisher.
+
+        Returns:
+            A dictionary of counters
+        """
+        with self._lock:
+            return {
+                "published": self.published,
+                "batches": self.batches,
+                "pending": sum(b.samples for b in self._batches.values()),
+            }
+
+    def _full(self, batch: _Batch) -> bool:
+        return (
+            batch.samples >= self.max_samples or batch.size >= self.max_bytes
+        )
+
+    def _publish(self, topic: str, batch: _Batch):
+        # Encoded Protobuf messages can be concatenated to merge their
+        # samples
+        payload = b"".join(
+            (
+                self.client.formatter.dumpb(part)
+                if isinstance(part, list)
+                else part.to_protobuf()
+            )
+            for part in batch.parts
+        )
+
+        self.client.publish(topic, payload)
+
+        with self._lock:
+            self.published += batch.samples
+            self.batches += 1
+
+    def _run(self):
+        while not self._stop.wait(self.linger / 2):
+            now = time.monotonic()
+
+            with self._lock:
+                expired = [
+                    (topic, self._batches.pop(topic))
+                    for topic, batch in list(self._batches.items())
+                    if now - batch.start >= self.linger
+                ]
+
+            for topic, batch in expired:
+                self._publish(topic, batch)
+
+
+def _estimate_size(sample: Sample) -> int:
+    # Timestamps, sequence and flags plus an embedded value message for each
+    # value. Real values are encoded as doubles, whereas both parts of
+    # complex values are floats.
+    return 32 + sum(14 if isinstance(v, complex) else 11 for v in sample.data)
+
+
+def _estimate_sizes(block: SampleBlock) -> np.ndarray:
+    # Same estimate as _estimate_size() for each row of a block
+    return 32 + 11 * block.length + 3 * (block.kinds == b"z").sum(axis=1)
+
+
+class AsyncClient:
+    """Asyncio-native MQTT client for the SEGuRo platform.
+
+    The network I/O of the paho client is driven by the running event loop
+    through reader and writer callbacks of its socket instead of a network
+    thread. Hence, coroutines can await the acknowledgement of publications
+    and iterate over received messages.
+
+    Use it as an asynchronous context manager or call connect() and close()
+    explicitly.
+
+    Args:
+      uid: An identifier of the client
+      host: The MQTT hostname or IP address. Defaults to localhost.
+      port: The port number used for connecting to the MQTT broker.
+            Defaults to 8883.
+      tls_cert: File containing the TLS client certificate for mutual TLS
+                authentication.
+      tls_key: File containing the TLS client key for mutual TLS
+               authentication.
+      tls_cacert: File containing the TLS certificate authority to validate
+                  the servers certificate against.
+      keepalive: The keepalive interval in seconds.
+      queue_size: Maximum number of messages waiting in each iterator
+                  returned by messages(). Further messages are dropped.
+      persistent: Use the uid as a stable client id and resume the session
+                  of a previous connection
+      max_inflight: Maximum number of QoS > 0 messages which are sent but
+                    not yet acknowledged
+      max_queued: Maximum number of outgoing messages waiting to be sent
+                  (0 for unlimited)
+
+    """
+
+    def __init__(
+        self,
+        uid=None,
+        host: str = config.MQTT_HOST,
+        port: int = config.MQTT_PORT,
+        tls_cert: str = config.TLS_CERT,
+        tls_key: str = config.TLS_KEY,
+        tls_cacert: str = config.TLS_CACERT,
+        keepalive=60,
+        queue_size: int = 1000,
+        persistent: bool = False,
+        max_inflight: int = 20,
+        max_queued: int = 0,
+    ):
+        self.logger = logging.getLogger(__name__)
+
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self.dropped = 0
+
+        self.formatter = Protobuf()
+
+        self.client = _create_client(
+            uid,
+            tls_cert,
+            tls_key,
+            tls_cacert,
+            persistent,
+            max_inflight,
+            max_queued,
+        )
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        self.client.on_subscribe = self._on_subscribe
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_register_write
+        self.client.on_socket_unregister_write = self._on_unregister_write
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._fd: int | None = None
+        self._misc: asyncio.Task | None = None
+        self._connected: asyncio.Future | None = None
+        self._disconnected: asyncio.Future | None = None
+
+        # Futures of unacknowledged publications and subscriptions by mid
+        self._pending: dict[int, asyncio.Future] = {}
+
+        # Queues of the message iterators and the subscribed topic filter
+        # by topic
+        self._queues: dict[str, set[asyncio.Queue[Message]]] = {}
+        self._filters: dict[str, str] = {}
+
+        self.router = TopicRouter()
+        self.client.on_message = self._on_message
+
+        # Messages of a resumed session which arrive before messages() has
+        # been called for their topic
+        self.persistent = persistent
+        self._unmatched: deque[Message] = deque(maxlen=queue_size)
+
+    async def __aenter__(self) -> "AsyncClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def connect(self):
+        """Connect to the broker and wait for its acknowledgement."""
+        self._loop = asyncio.get_running_loop()
+        self._connected = self._loop.create_future()
+
+        # The TCP and TLS handshakes block
+        await asyncio.to_thread(
+            self.client.connect, self.host, self.port, self.keepalive
+        )
+
+        await self._connected
+
+    async def close(self):
+        """Disconnect from the broker."""
+        if self._loop is None or self._fd is None:
+            return
+
+        self._disconnected = self._loop.create_future()
+        self.client.disconnect()
+
+        try:
+            await asyncio.wait_for(self._disconnected, 10)
+        except TimeoutError:
+            self.logger.warning("Timed out waiting for disconnect")
+
+    async def publish(
+        self, topic: str, message: PayloadType, qos: int = 0
+    ) -> MQTTMessageInfo:
+        """Publish message to given topic.
+
+        Args:
+          topic: The topic
+          message: The payload
+          qos: The quality of service level
+
+        Returns:
+            MQTTMessageInfo: The MQTT message information once the message
+            has been sent (QoS 0) or acknowledged by the broker (QoS 1, 2)
+
+        Raises:
+            ConnectionError: If the client is not connected or the
+                             connection is lost before the message has been
+                             acknowledged
+
+        """
+        self.logger.debug("Send msg: %s - %s", topic, message)
+
+        fut = self._future()
+
+        info = self.client.publish(topic, message, qos)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise ConnectionError(mqtt.error_string(info.rc))
+
+        if not info.is_published():
+            self._pending[info.mid] = fut
+            await fut
+
+        return info
+
+    async def publish_samples(
+        self, topic: str, samples: Iterable[Sample], qos: int = 0
+    ) -> MQTTMessageInfo:
+        """Publish samples to given topic.
+
+        Args:
+          topic: The topic
+          samples: The samples
+          qos: The quality of service level
+
+        Returns:
+            MQTTMessageInfo: The MQTT message information
+
+        """
+        return await self.publish(topic, self.formatter.dumpb(samples), qos)
+
+    async def publish_block(
+        self, topic: str, block: SampleBlock, qos: int = 0
+    ) -> MQTTMessageInfo:
+        """Publish a block of samples to given topic.
+
+        Args:
+          topic: The topic
+          block: The block of samples
+          qos: The quality of service level
+
+        Returns:
+            MQTTMessageInfo: The MQTT message information
+
+        """
+        return await self.publish(topic, block.to_protobuf(), qos)
+
+    async def subscribe(
+        self, topic: str, qos: int = 0, group: str | None = None
+    ):
+        """Subscribe to a topic and wait for the acknowledgement.
+
+        Received messages are only delivered to iterators of messages().
+
+        Args:
+          topic: The topic that is subscribed
+          qos: The maximum quality of service level
+          group: Share the subscription with other clients of this group
+
+        """
+        fut = self._future()
+
+        rc, mid = self.client.subscribe(_shared(topic, group), qos)
+        if rc != mqtt.MQTT_ERR_SUCCESS or mid is None:
+            raise ConnectionError(mqtt.error_string(rc))
+
+        self._pending[mid] = fut
+        reason_codes = await fut
+
+        for reason_code in reason_codes:
+            if reason_code.is_failure:
+                raise ConnectionError(f"Failed to subscribe to {topic}")
+
+    async def messages(
+        self, topic: str, qos: int = 0, group: str | None = None
+    ) -> AsyncGenerator[Message, None]:
+        """Subscribe to a topic and iterate over the received messages.
+
+        The topic is unsubscribed once all of its iterators are closed.
+
+        Args:
+          topic: The topic that is subscribed
+          qos: The maximum quality of service level
+          group: Share the subscription with other clients of this group.
+                 The group of the first iterator of a topic applies.
+
+        Returns:
+            An asynchronous iterator of MQTT messages
+        """
+        queue: asyncio.Queue[Message] = asyncio.Queue(self.queue_size)
+
+        queues = self._queues.get(topic)
+        if queues is None:
+            queues = self._queues[topic] = set()
+            self._filters[topic] = _shared(topic, group)
+            self.router.insert(topic, ft.partial(self._enqueue, queues))
+
+            for msg in list(self._unmatched):
+                if mqtt.topic_matches_sub(topic, msg.topic):
+                    self._unmatched.remove(msg)
+                    queue.put_nowait(msg)
+
+        queues.add(queue)
+
+        try:
+            if len(queues) == 1:
+                await self.subscribe(topic, qos, group)
+
+            while True:
+                yield await queue.get()
+        finally:
+            queues.discard(queue)
+
+            if not queues:
+                del self._queues[topic]
+                self.router.remove(topic)
+                self.client.unsubscribe(self._filters.pop(topic))
+
+    def _future(self) -> asyncio.Future:
+        if self._loop is None:
+            raise ConnectionError("Client is not connected")
+
+        return self._loop.create_future()
+
+    def _call(self, func: Callable, *args):
+        # The socket callbacks of connect() are called from another thread
+        assert self._loop is not None
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def _read(self):
+        self.client.loop_read()
+
+        # Decrypted data which is buffered by the SSL socket is not signaled
+        # by the event loop
+        while (
+            isinstance(sock := self.client.socket(), ssl.SSLSocket)
+            and sock.pending()
+        ):
+            self.client.loop_read()
+
+    async def _loop_misc(self):
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    def _open(self, fd: int):
+        assert self._loop is not None
+
+        self._fd = fd
+        self._loop.add_reader(fd, self._read)
+        self._misc = self._loop.create_task(self._loop_misc())
+
+    def _closed(self, fd: int):
+        assert self._loop is not None
+
+        self._loop.remove_reader(fd)
+        self._loop.remove_writer(fd)
+
+        if self._misc is not None:
+            self._misc.cancel()
+            self._misc = None
+
+    def _on_socket_open(self, _client, _ctx, sock):
+        self._call(self._open, sock.fileno())
+
+    def _on_socket_close(self, _client, _ctx, _sock):
+        if self._fd is not None:
+            self._call(self._closed, self._fd)
+            self._fd = None
+
+    def _on_register_write(self, _client, _ctx, sock):
+        assert self._loop is not None
+        self._call(
+            self._loop.add_writer, sock.fileno(), self.client.loop_write
+        )
+
+    def _on_unregister_write(self, _client, _ctx, sock):
+        assert self._loop is not None
+        self._call(self._loop.remove_writer, sock.fileno())
+
+    def _on_connect(self, _client, _ctx, _flags, reason_code, _props):
+        fut = self._connected
+        if fut is None or fut.done():
+            return
+
+        if reason_code.is_failure:
+            fut.set_exception(ConnectionError(str(reason_code)))
+        else:
+            fut.set_result(None)
+
+    def _on_disconnect(self, _client, _ctx, _flags, reason_code, _props):
+        self.logger.debug("Disconnected: %s", reason_code)
+
+        if self._disconnected is not None and not self._disconnected.done():
+            self._disconnected.set_result(None)
+
+        if self._connected is not None and not self._connected.done():
+            self._connected.set_exception(ConnectionError(str(reason_code)))
+
+        pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError(str(reason_code)))
+
+    def _on_publish(self, _client, _ctx, mid, _reason_code, _props):
+        self._resolve(mid, None)
+
+    def _on_subscribe(self, _client, _ctx, mid, reason_codes, _props):
+        self._resolve(mid, reason_codes)
+
+    def _resolve(self, mid: int, result: Any):
+        fut = self._pending.pop(mid, None)
+        if fut is not None and not fut.done():
+            fut.set_result(result)
+
+    def _on_message(self, _client, _ctx, msg: Message):
+        routes = self.router.match(msg.topic)
+        if not routes and self.persistent:
+            self._unmatched.append(msg)
+
+        for route in routes:
+            route(msg)
+
+    def _enqueue(self, queues: set[asyncio.Queue[Message]], msg: Message):
+        self.logger.debug("Recv msg: %s - %s", msg.topic, msg.payload)
+
+        for queue in queues:
+            try:
+                queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                self.dropped += 1
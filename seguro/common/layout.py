@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime
+import posixpath
+from enum import Enum
+from typing import Iterable
+
+from villas.node.sample import Timestamp
+
+
+class Layout(Enum):
+    """Naming scheme of frame objects in the store.
+
+    FLAT:  <topic>/<timestamp>.parquet
+    HIVE:  <topic>/date=<YYYY-MM-DD>/hour=<HH>/<timestamp>.parquet
+    """
+
+    FLAT = "flat"
+    HIVE = "hive"
+
+
+def object_name(
+    topic: str,
+    start: Timestamp,
+    precise: bool = False,
+    layout: Layout = Layout.FLAT,
+) -> str:
+    """Get the object name of a frame.
+
+    Args:
+      topic: The MQTT topic of the recorder
+      start: The origin timestamp of the first sample in the frame
+      precise: Include microseconds in the object name
+      layout: The naming scheme of frame objects
+
+    Returns:
+        The object name
+    """
+    ts = start.datetime()
+    if precise:
+        name = ts.isoformat(timespec="microseconds")
+    else:
+        name = ts.replace(microsecond=0).isoformat()
+
+    parts = [topic]
+
+    if layout == Layout.HIVE:
+        parts += [f"date={ts:%Y-%m-%d}", f"hour={ts:%H}"]
+
+    return posixpath.join(*parts, f"{name}.parquet")
+
+
+def object_topic(filename: str) -> str:
+    """Get the topic of a frame object.
+
+    Args:
+      filename: The object name of the frame
+
+    Returns:
+        The MQTT topic of the frame without any partition components
+    """
+    parts = posixpath.dirname(filename).split("/")
+    while parts and "=" in parts[-1]:
+        parts.pop()
+
+    return "/".join(parts)
+
+
+def object_time(filename: str) -> datetime.datetime | None:
+    """Get the timestamp of the first sample in a frame object.
+
+    Args:
+      filename: The object name of the frame
+
+    Returns:
+        The timestamp in UTC or None if the object name does not contain one
+    """
+    stem = posixpath.basename(filename).removesuffix(".parquet")
+
+    # Compacted frames carry an additional suffix, e.g. "_compacted"
+    stem = stem.split("_", 1)[0]
+
+    try:
+        return utc(datetime.datetime.fromisoformat(stem))
+    except ValueError:
+        return None
+
+
+def utc(ts: datetime.datetime) -> datetime.datetime:
+    """Convert a timestamp to UTC.
+
+    Timestamps without a timezone are assumed to be in UTC already, like
+    the timestamps of samples.
+
+    Args:
+      ts: The timestamp
+
+    Returns:
+        The timezone-aware timestamp in UTC
+    """
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=datetime.timezone.utc)
+
+    return ts.astimezone(datetime.timezone.utc)
+
+
+def select_frames(
+    filenames: Iterable[str],
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+) -> list[str]:
+    """Select frame objects which may contain samples of a time range.
+
+    The time range of each object is derived from the timestamp in its
+    name which marks its first sample. An object is assumed to cover
+    all samples up to the first sample of the next object of the same
+    topic. Objects without a timestamp are always selected.
+
+    Args:
+      filenames: The object names of the frames
+      start: Only select objects containing samples after this time
+      end: Only select objects containing samples before this time
+
+    Returns:
+        The selected object names ordered by time
+    """
+    if start is not None:
+        start = utc(start)
+    if end is not None:
+        end = utc(end)
+
+    topics: dict[str, list[tuple[datetime.datetime, str]]] = {}
+    untimed: list[str] = []
+
+    for name in filenames:
+        ts = object_time(name)
+        if ts is None:
+            untimed.append(name)
+        else:
+            topics.setdefault(object_topic(name), []).append((ts, name))
+
+    selected: list[tuple[datetime.datetime, str]] = []
+
+    for frames in topics.values():
+        frames.sort()
+
+        for i, (ts, name) in enumerate(frames):
+            if end is not None and ts >= end:
+                break
+
+            if start is not None and i + 1 < len(frames):
+                next_ts, _ = frames[i + 1]
+                if next_ts <= start:
+                    continue
+
+            selected.append((ts, name))
+
+    return [name for _, name in sorted(selected)] + untimed
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import uuid
+from itertools import chain
 
 from seguro.common import broker, store
 from seguro.commands.notifier.model import (
@@ -26,25 +27,35 @@ def notify(
     s = store.Client()
 
     # Upload attachments to store
+    raw: dict[int, tuple[str, bytes]] = {}
+    files: dict[int, tuple[str, str]] = {}
+
     for i, att in enumerate(attachments):
         if isinstance(att, RawAttachment):
             att_obj = (
                 f"attachments/{uuid.uuid4()}/"
                 + "{att.name if att.name else 'raw.bin'}"
             )
-            obj = s.put_file_contents(att_obj, att.contents)
+            raw[i] = (att_obj, att.contents)
 
         elif isinstance(att, FileAttachment):
             att_obj = f"attachments/{uuid.uuid4()}/{att.file.name}"
-            obj = s.put_file(att_obj, att.file.as_posix())
+            files[i] = (att_obj, att.file.as_posix())
+
+    results = chain(
+        zip(raw.keys(), s.put_many(raw.values())),
+        zip(files.keys(), s.put_files(files.values())),
+    )
 
-        else:
-            continue
+    for i, res in results:
+        if res.error is not None:
+            raise res.error
 
+        att = attachments[i]
         attachments[i] = StoreAttachment(
             inline=att.inline,
             expires=att.expires,
-            object_name=obj.object_name,
+            object_name=res.result.object_name,
         )
 
     b.publish(
@@ -2,17 +2,47 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import io
+import os
+import json
+import time
+import pathlib
+import asyncio
 import threading
 import enum
 import logging
 import minio
+import minio.error
 import minio.credentials
 import urllib3
+import urllib.parse
 import datetime
+import posixpath
+import collections
+import functools
+import xml.etree.ElementTree as ElementTree
+import concurrent.futures
+import s3fs
 import pandas as pd
-from typing import Callable
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from queue import Queue
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    TypeVar,
+)
 
 from seguro.common import config
+from seguro.common.layout import select_frames
+
+T = TypeVar("T")
 
 
 class Event(enum.Flag):
@@ -27,6 +57,298 @@ class Event(enum.Flag):
         return ""
 
 
+@dataclass
+class PutResult:
+    """Outcome of a single upload of Client.put_many() or put_files()"""
+
+    filename: str
+    result: Any = None
+    error: Exception | None = None
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    """State of an object used to detect changes"""
+
+    etag: str | None = None
+    last_modified: datetime.datetime | None = None
+    size: int | None = None
+
+    def changed(self, other: "ObjectInfo") -> bool:
+        """Check if another state describes a newer version of the object.
+
+        Args:
+          other: The other state
+
+        Returns:
+            True if the contents or modification time differ
+        """
+        if self.etag != other.etag:
+            return True
+
+        if self.last_modified is None or other.last_modified is None:
+            return False
+
+        # Event times and listings of the same write differ slightly
+        delta = other.last_modified - self.last_modified
+        return delta > datetime.timedelta(seconds=1)
+
+
+@dataclass
+class CacheEntry:
+    """Cached contents of an object"""
+
+    etag: str | None
+    content: bytes
+    parsed: dict[Callable[[bytes], Any], Any] = field(default_factory=dict)
+
+    def load(self, loader: Callable[[bytes], T]) -> T:
+        if loader not in self.parsed:
+            self.parsed[loader] = loader(self.content)
+
+        return self.parsed[loader]
+
+
+class ExpiringCredentials(minio.credentials.Credentials):
+    """Temporary credentials which expose their expiry.
+
+    minio keeps the expiry of its credentials private.
+
+    Args:
+      access_key: The access key
+      secret_key: The secret key
+      session_token: The session token
+      expiration: The time at which the credentials expire
+
+    """
+
+    def __init__(
+        self,
+        access_key: str,
+        secret_key: str,
+        session_token: str | None,
+        expiration: datetime.datetime,
+    ):
+        super().__init__(access_key, secret_key, session_token, expiration)
+
+        self.expiration = expiration
+
+
+class CertificateProvider(minio.credentials.Provider):
+    """Credential provider using the AssumeRoleWithCertificate STS API.
+
+    Unlike minio.credentials.CertificateIdentityProvider, the retrieved
+    credentials expose their expiry.
+
+    Args:
+      sts_endpoint: URL of the STS endpoint
+      http_client: Pool which authenticates with the client certificate
+      lifetime: Requested duration for which the credentials are valid
+
+    """
+
+    def __init__(
+        self,
+        sts_endpoint: str,
+        http_client: urllib3.PoolManager,
+        lifetime: datetime.timedelta,
+    ):
+        self.sts_endpoint = sts_endpoint
+        self.http_client = http_client
+        self.lifetime = lifetime
+
+        self._credentials: ExpiringCredentials | None = None
+
+    def retrieve(self) -> ExpiringCredentials:
+        if self._credentials and not self._credentials.is_expired():
+            return self._credentials
+
+        query = urllib.parse.urlencode(
+            {
+                "Action": "AssumeRoleWithCertificate",
+                "Version": "2011-06-15",
+                "DurationSeconds": int(self.lifetime.total_seconds()),
+            }
+        )
+
+        res = self.http_client.request("POST", f"{self.sts_endpoint}?{query}")
+        if res.status != 200:
+            raise ValueError(
+                f"Failed to retrieve credentials: HTTP status {res.status}"
+            )
+
+        # Element names without their XML namespace
+        values = {
+            element.tag.rpartition("}")[2]: element.text
+            for element in ElementTree.fromstring(res.data).iter()
+        }
+
+        self._credentials = ExpiringCredentials(
+            access_key=values["AccessKeyId"] or "",
+            secret_key=values["SecretAccessKey"] or "",
+            session_token=values.get("SessionToken"),
+            expiration=datetime.datetime.fromisoformat(
+                values["Expiration"] or ""
+            ),
+        )
+
+        return self._credentials
+
+
+class RenewingProvider(minio.credentials.Provider):
+    """Credential provider which renews temporary credentials ahead of their
+    expiry.
+
+    Providers of temporary credentials only renew them seconds before they
+    expire, which is too late for long-running transfers. Hence, the
+    wrapped provider is replaced by a new one once its credentials are
+    about to expire.
+
+    The renewal deadline is taken from the expiry of ExpiringCredentials.
+    Other credentials are assumed to be valid for the given lifetime.
+
+    Args:
+      factory: Creates a provider of temporary credentials
+      lifetime: Duration for which the credentials are requested
+      refresh_margin: Renew the credentials this long before they expire
+
+    Raises:
+      ValueError: If the refresh margin is not shorter than the lifetime
+
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], minio.credentials.Provider],
+        lifetime: datetime.timedelta,
+        refresh_margin: datetime.timedelta,
+    ):
+        if refresh_margin >= lifetime:
+            raise ValueError(
+                "The refresh margin must be shorter than the lifetime"
+            )
+
+        self.factory = factory
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+
+        self._provider = factory()
+        self._credentials: minio.credentials.Credentials | None = None
+        self._deadline = 0.0
+        self._lock = threading.Lock()
+
+    def retrieve(self) -> minio.credentials.Credentials:
+        with self._lock:
+            if self.needs_renewal():
+                self._provider = self.factory()
+
+            creds = self._provider.retrieve()
+            if creds is not self._credentials:
+                self._credentials = creds
+                self._deadline = time.monotonic() + self._max_age(creds)
+
+            return creds
+
+    def needs_renewal(self) -> bool:
+        """Check if the credentials expire within the refresh margin.
+
+        Returns:
+            True if the credentials should be renewed
+        """
+        if self._credentials is None:
+            return False
+
+        return time.monotonic() >= self._deadline
+
+    def _max_age(self, creds: minio.credentials.Credentials) -> float:
+        validity = self.lifetime
+        if isinstance(creds, ExpiringCredentials):
+            expiration = creds.expiration
+            if expiration.tzinfo is None:
+                expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+
+            validity = expiration - datetime.datetime.now(
+                datetime.timezone.utc
+            )
+
+        # Credentials which have been issued for a shorter duration than
+        # the refresh margin are renewed halfway through their validity
+        max_age = validity - self.refresh_margin
+        if max_age <= datetime.timedelta(0):
+            max_age = validity / 2
+
+        return max(max_age.total_seconds(), 0.0)
+
+
+class ContentCache:
+    """LRU cache of object contents limited by their total size
+
+    Args:
+      max_bytes: Maximum total size of the cached contents
+
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: collections.OrderedDict[
+            str, CacheEntry
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def get(self, filename: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+
+            return entry
+
+    def put(
+        self, filename: str, etag: str | None, content: bytes
+    ) -> CacheEntry:
+        entry = CacheEntry(etag, content)
+
+        with self._lock:
+            self._remove(filename)
+
+            # Objects larger than the cache are passed through
+            if len(content) > self.max_bytes:
+                return entry
+
+            self._entries[filename] = entry
+            self.size += len(content)
+
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+        return entry
+
+    def invalidate(self, filename: str):
+        with self._lock:
+            self._remove(filename)
+
+    def _remove(self, filename: str):
+        entry = self._entries.pop(filename, None)
+        if entry is not None:
+            self.size -= len(entry.content)
+
+
 class Client:
     """Helper class for S3 object store interaction with the SEGuRo platform
 
@@ -48,6 +370,14 @@ class Client:
         secure: Establish secure connection via TLS
         region: The S3 region
         bucket: The S3 bucket
+        cache_size: Maximum size of object contents cached by
+                    get_cached_contents() in bytes
+        refresh_margin: Renew temporary credentials this long before they
+                        expire
+        health_check_interval: Periodically check the availability of the
+                               bucket at this interval in seconds
+        max_connections: Number of HTTP connections which are kept open for
+                         concurrent requests
 
     """
 
@@ -60,27 +390,53 @@ class Client:
         tls_key: str = config.TLS_KEY,
         region: str = config.S3_REGION,
         bucket: str = config.S3_BUCKET,
+        refresh_margin: datetime.timedelta = datetime.timedelta(minutes=5),
+        health_check_interval: float | None = None,
+        max_connections: int = 10,
+        cache_size: int = 16 * 1024 * 1024,
     ):
         self.logger = logging.getLogger(__name__)
         self.bucket = bucket
+        self.endpoint = f"{host}:{port}"
+        self.region = region
+        self.refresh_margin = refresh_margin
+        self.cache = ContentCache(cache_size)
 
+        self.max_connections = max_connections
         self.http_client = urllib3.PoolManager(
-            cert_reqs="CERT_REQUIRED", ca_certs=tls_cacert
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=tls_cacert,
+            maxsize=max_connections,
         )
 
-        self.creds = minio.credentials.CertificateIdentityProvider(
-            sts_endpoint=f"https://{host}:{port}",
+        # Authenticates with the client certificate to retrieve credentials
+        sts_client = urllib3.PoolManager(
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=tls_cacert,
             cert_file=tls_cert,
             key_file=tls_key,
-            ca_certs=tls_cacert,
+        )
+
+        lifetime = datetime.timedelta(hours=1)
+        self.creds = RenewingProvider(
+            lambda: CertificateProvider(
+                f"https://{host}:{port}", sts_client, lifetime
+            ),
+            lifetime,
+            refresh_margin,
         )
         self.client = minio.Minio(
-            endpoint=f"{host}:{port}",
+            endpoint=self.endpoint,
             region=region,
             credentials=self.creds,
             http_client=self.http_client,
         )
 
+        # Long-lived filesystem used by Pandas and PyArrow
+        self._fs: s3fs.S3FileSystem | None = None
+        self._fs_creds: minio.credentials.Credentials | None = None
+        self._creds_lock = threading.Lock()
+
         # Used by Pandas
         creds = self.creds.retrieve()
         self._storage_options = {
@@ -98,8 +454,59 @@ class Client:
         if not self.client.bucket_exists(self.bucket):
             raise Exception(f"Error: Bucket {self.bucket} does not exist...")
 
+        self.healthy = True
+        self._stopflag = threading.Event()
+
+        # Shared notification stream of all watchers of this client
+        self._notifications: Multiplexer | None = None
+        self._notifications_lock = threading.Lock()
+
+        self._indexes: dict[str, Watcher] = {}
+
+        if health_check_interval is not None:
+            self._health_checker = threading.Thread(
+                target=self._check_health,
+                args=(health_check_interval,),
+                daemon=True,
+            )
+            self._health_checker.start()
+
+    def close(self):
+        """Stop the periodic health check and all watchers."""
+        self._stopflag.set()
+
+        for watcher in self._indexes.values():
+            watcher.stop()
+
+        if self._notifications is not None:
+            self._notifications.stop()
+
+    def _check_health(self, interval: float):
+        while not self._stopflag.wait(interval):
+            try:
+                healthy = self.client.bucket_exists(self.bucket)
+            except Exception as e:
+                self.logger.debug("Health check failed: %s", e)
+                healthy = False
+
+            if healthy != self.healthy:
+                if healthy:
+                    self.logger.info("Store is available again")
+                else:
+                    self.logger.warning("Store is unavailable")
+
+            self.healthy = healthy
+
+    def credentials(self) -> minio.credentials.Credentials:
+        """Get temporary credentials and renew them ahead of their expiry.
+
+        Returns:
+            The current credentials
+        """
+        return self.creds.retrieve()
+
     def storage_options(self):
-        creds = self.creds.retrieve()
+        creds = self.credentials()
         self._storage_options["client_kwargs"][
             "aws_access_key_id"
         ] = creds.access_key  # type: ignore
@@ -112,6 +519,42 @@ class Client:
 
         return self._storage_options
 
+    def filesystem(self) -> s3fs.S3FileSystem:
+        """Get an fsspec filesystem for accessing objects of the store.
+
+        The filesystem and its connections are reused across calls and only
+        recreated after the credentials have been renewed.
+        Paths are of the form "<bucket>/<object name>".
+
+        Returns:
+            The filesystem
+        """
+        creds = self.credentials()
+
+        with self._creds_lock:
+            if self._fs is None or creds is not self._fs_creds:
+                self._fs = s3fs.S3FileSystem(**self._filesystem_args(creds))
+                self._fs_creds = creds
+
+            return self._fs
+
+    def _filesystem_args(
+        self, creds: minio.credentials.Credentials
+    ) -> dict[str, Any]:
+        opts = self._storage_options
+
+        return {
+            "endpoint_url": opts["endpoint_url"],
+            "use_ssl": opts["use_ssl"],
+            "client_kwargs": {
+                **opts["client_kwargs"],  # type: ignore
+                "aws_access_key_id": creds.access_key,
+                "aws_secret_access_key": creds.secret_key,
+                "aws_session_token": creds.session_token,
+            },
+            "skip_instance_cache": True,
+        }
+
     def get_file(self, filename: str, file: str):
         """Download file from the S3 object store and store it locally.
 
@@ -162,6 +605,92 @@ class Client:
         """
         return self.client.fput_object(self.bucket, filename, file)
 
+    def put_files(
+        self,
+        files: Mapping[str, str] | Iterable[tuple[str, str]],
+        max_workers: int | None = None,
+        part_size: int = 0,
+    ) -> list[PutResult]:
+        """Upload multiple local files concurrently.
+
+        Files larger than the part size are uploaded as multipart uploads.
+
+        Args:
+          files: Names of the objects in the storage and their local files
+          max_workers: Number of concurrent uploads. Defaults to the
+                       number of HTTP connections of the client.
+          part_size: Size of the parts of multipart uploads in bytes.
+                     Determined automatically if 0.
+
+        Returns:
+            The results of the uploads in the order of the files
+        """
+
+        def put(filename: str, file: str):
+            return self.client.fput_object(
+                self.bucket, filename, file, part_size=part_size
+            )
+
+        return self._put_concurrently(put, files, max_workers)
+
+    def put_many(
+        self,
+        objects: Mapping[str, bytes] | Iterable[tuple[str, bytes]],
+        max_workers: int | None = None,
+        part_size: int = 0,
+    ) -> list[PutResult]:
+        """Write the contents of multiple objects concurrently.
+
+        Args:
+          objects: Names of the objects in the storage and their contents
+          max_workers: Number of concurrent uploads. Defaults to the
+                       number of HTTP connections of the client.
+          part_size: Size of the parts of multipart uploads in bytes.
+                     Determined automatically if 0.
+
+        Returns:
+            The results of the uploads in the order of the objects
+        """
+
+        def put(filename: str, content: bytes):
+            return self.client.put_object(
+                self.bucket,
+                filename,
+                io.BytesIO(content),
+                len(content),
+                part_size=part_size,
+            )
+
+        return self._put_concurrently(put, objects, max_workers)
+
+    def _put_concurrently(
+        self,
+        put: Callable[[str, Any], Any],
+        items: Mapping[str, Any] | Iterable[tuple[str, Any]],
+        max_workers: int | None,
+    ) -> list[PutResult]:
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        if max_workers is None:
+            max_workers = self.max_connections
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [
+                (filename, executor.submit(put, filename, item))
+                for filename, item in items
+            ]
+
+        results = []
+        for filename, future in futures:
+            try:
+                results.append(PutResult(filename, result=future.result()))
+            except Exception as e:
+                self.logger.error("Failed to upload %s: %s", filename, e)
+                results.append(PutResult(filename, error=e))
+
+        return results
+
     def remove_file(self, filename: str):
         """Remove a local file from the S3Storage.
 
@@ -186,9 +715,6 @@ class Client:
         Returns:
 
         """
-        if not self.client.bucket_exists(self.bucket):
-            raise Exception(f"Error: Bucket {self.bucket} does not exist...")
-
         return self.client.put_object(
             self.bucket,
             filename,
@@ -207,25 +733,90 @@ class Client:
         Returns:
 
         """
-        if not self.client.bucket_exists(self.bucket):
-            raise Exception(f"Error: Bucket {self.bucket} does not exist...")
-
         return self.client.get_object(self.bucket, filename)
 
-    def put_frame(self, filename: str, df: pd.DataFrame):
+    def get_cached_contents(
+        self,
+        filename: str,
+        loader: Callable[[bytes], T] | None = None,
+    ) -> Any:
+        """Read a small object through a cache which is revalidated by the
+        ETag of the object.
+
+        Unchanged objects cost a conditional request answered with
+        "304 Not Modified" instead of a full download. No request is made
+        at all if an index of the client covers the object.
+
+        Args:
+          filename: Name of file in storage
+          loader: Optional function which parses the contents. Its result
+                  is cached as well and must not be modified.
+
+        Returns:
+            The contents or the result of the loader
+        """
+        entry = self.cache.get(filename)
+
+        if entry is not None and entry.etag is not None:
+            info = self._indexed(filename)
+            if info is not None and info.etag == entry.etag:
+                self.cache.hit()
+                return entry.load(loader) if loader else entry.content
+
+        headers: dict[str, str] = {}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = f'"{entry.etag}"'
+
+        # The minio client does not expose the status of a "304 Not
+        # Modified" response, so the conditional request is presigned
+        url = self.client.get_presigned_url(
+            "GET",
+            self.bucket,
+            filename,
+            expires=datetime.timedelta(minutes=5),
+        )
+        resp = self.http_client.request("GET", url, headers=headers)
+
+        if resp.status == 304 and entry is not None:
+            self.cache.hit()
+        elif resp.status == 200:
+            self.cache.miss()
+            entry = self.cache.put(
+                filename, _strip_etag(resp.headers.get("ETag")), resp.data
+            )
+        else:
+            self.cache.invalidate(filename)
+            raise _response_error(resp)
+
+        return entry.load(loader) if loader else entry.content
+
+    def _indexed(self, filename: str) -> ObjectInfo | None:
+        if self._notifications is None:
+            return None
+
+        objects = self._notifications.lookup(filename)
+        if objects is None:
+            return None
+
+        return objects.get(filename)
+
+    def put_frame(self, filename: str, df: pd.DataFrame, **kwargs):
         """Upload a Pandas Dataframe as a Parquet file to the store
 
         Args:
           filename: The filename at which it should be stored
           df: The Pandas DataFrame
+          **kwargs: Additional arguments for the Parquet writer
+                    (e.g. row_group_size)
 
         Returns:
 
         """
         df.to_parquet(
-            f"s3://{self.bucket}/{filename}",
+            f"{self.bucket}/{filename}",
             compression="zstd",
-            storage_options=self.storage_options(),
+            filesystem=self.filesystem(),
+            **kwargs,
         )
 
     def get_frame(self, filename: str) -> pd.DataFrame:
@@ -238,146 +829,1255 @@ class Client:
 
         """
         return pd.read_parquet(
-            f"s3://{self.bucket}/{filename}",
-            storage_options=self.storage_options(),
+            f"{self.bucket}/{filename}",
+            filesystem=self.filesystem(),
         )
 
-    def watch(
+    def get_frame_batches(
         self,
-        prefix: str,
-        events: Event = Event.CREATED | Event.REMOVED,
-        initial: bool = False,
-    ):
-        """
+        filename: str,
+        columns: list[str] | None = None,
+        filter: ds.Expression | None = None,
+        batch_size: int = 64 * 1024,
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream a Parquet file from the store in record batches.
+
+        Only the row groups and columns which are needed are fetched using
+        ranged reads so that arbitrarily large objects can be processed in
+        bounded memory.
 
         Args:
-          prefix: str:
-          events: Event:  (Default value = Event.CREATED | Event.REMOVED)
-          initial: bool:  (Default value = False)
+          filename: The filename from which it should be retrieved
+          columns: Only read these columns (the index is always included)
+          filter: Only return rows matching this PyArrow expression,
+                  e.g. pyarrow.dataset.field("signal0") > 0
+          batch_size: Maximum number of rows per batch
 
         Returns:
-
+            An iterator of PyArrow record batches
         """
-        s3_events = []
-        if Event.CREATED in events:
-            s3_events.append("s3:ObjectCreated:*")
-        if Event.REMOVED in events:
-            s3_events.append("s3:ObjectRemoved:*")
+        dataset, scan = self._query([filename], columns=columns)
+        if filter is not None:
+            scan["filter"] = filter
 
-        if initial and Event.CREATED in events:
-            objs = self.client.list_objects(
-                self.bucket, prefix=prefix, recursive=True
-            )
-            for obj in objs:
-                yield Event.CREATED, obj.object_name
-
-        with self.client.listen_bucket_notification(
-            self.bucket,
-            prefix=prefix,
-            events=tuple(s3_events),
-        ) as events:
-            for event in events:
-                yield _decode_event(event)
+        yield from dataset.to_batches(batch_size=batch_size, **scan)
 
-    def watch_async(
+    def get_frame_chunks(
         self,
-        prefix: str,
-        cb: Callable[["Client", Event, str], None],
-        events=Event.CREATED | Event.REMOVED,
-        initial: bool = False,
-    ) -> "Watcher":
-        """
+        filename: str,
+        columns: list[str] | None = None,
+        filter: ds.Expression | None = None,
+        batch_size: int = 64 * 1024,
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a Parquet file from the store in Pandas DataFrames.
 
-        Args:
-          prefix: str:
-          cb: Callable[["Client":
-          Event:
-          str]:
-          None]:
-          events:  (Default value = Event.CREATED | Event.REMOVED)
-          initial: bool:  (Default value = False)
+        See get_frame_batches() for a description of the arguments.
 
         Returns:
+            An iterator of Pandas DataFrames
+        """
+        for batch in self.get_frame_batches(
+            filename, columns, filter, batch_size
+        ):
+            yield batch.to_pandas()
+
+    def put_frame_chunks(
+        self, filename: str, chunks: Iterable[pd.DataFrame], **kwargs
+    ):
+        """Upload a sequence of Pandas DataFrames as a single Parquet file
+
+        Each chunk is written as a separate row group while uploading, so
+        that only a single chunk needs to be held in memory. No object is
+        created if no chunks are provided.
+
+        Args:
+          filename: The filename at which it should be stored
+          chunks: DataFrames which share the same columns and types
+          **kwargs: Additional arguments for the Parquet writer
 
         """
-        return Watcher(self, prefix, cb, events, initial)
+        writer: pq.ParquetWriter | None = None
 
+        fs = self.filesystem()
+        with ExitStack() as stack:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk)
 
-class Watcher(threading.Thread):
-    """Helper class for asynchronous watching of of S3 objects"""
+                # The object is only opened once the schema is known
+                if writer is None:
+                    f = stack.enter_context(
+                        fs.open(f"{self.bucket}/{filename}", "wb")
+                    )
+                    writer = pq.ParquetWriter(
+                        f, table.schema, compression="zstd", **kwargs
+                    )
 
-    def __init__(
+                writer.write_table(table)
+
+            if writer is not None:
+                writer.close()
+
+    def list_frames(
         self,
-        client: Client,
         prefix: str,
-        cb: Callable[[Client, Event, str], None],
-        events: Event = Event.CREATED | Event.REMOVED,
-        initial: bool = False,
-    ):
-        super().__init__()
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+    ) -> list[str]:
+        """List frame objects which may contain samples of a time range.
 
-        self.cb = cb
-        self.client = client
-        self._stopflag = threading.Event()
+        Objects are selected by the timestamps in their names (see
+        seguro.common.layout.select_frames()).
 
-        s3_events = []
-        if Event.CREATED in events:
-            s3_events.append("s3:ObjectCreated:*")
-        if Event.REMOVED in events:
-            s3_events.append("s3:ObjectRemoved:*")
+        Args:
+          prefix: Prefix of the objects, e.g. the topic of a recorder
+          start: Only list objects containing samples after this time
+          end: Only list objects containing samples before this time
 
-        if initial and Event.CREATED in events:
-            objs = self.client.client.list_objects(
-                self.client.bucket, prefix=prefix, recursive=True
-            )
-            for obj in objs:
-                cb(self.client, Event.CREATED, obj.object_name)
+        Returns:
+            The names of the objects ordered by time
+        """
+        objs = self.client.list_objects(
+            self.bucket, prefix=prefix, recursive=True
+        )
 
-        self.events = self.client.client.listen_bucket_notification(
-            self.client.bucket,
-            prefix=prefix,
-            events=tuple(s3_events),
+        return select_frames(
+            (
+                obj.object_name
+                for obj in objs
+                if obj.object_name.endswith(".parquet")
+            ),
+            start,
+            end,
         )
 
-        self.start()
+    def _query(
+        self,
+        objs: list[str],
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        columns: list[str] | None = None,
+    ) -> tuple[ds.Dataset, dict]:
+        """Prepare a PyArrow dataset for reading multiple frame objects.
 
-    def run(self):
-        self.client.logger.debug("Started watcher")
+        Args:
+          objs: The names of the frame objects
+          start: Only read rows with an index at or after this time
+          end: Only read rows with an index before this time
+          columns: Only read these columns (the index is always included)
 
-        while True:
-            try:
-                event = next(self.events)
+        Returns:
+            The dataset and keyword arguments for scanning it
+        """
+        fs = self.filesystem()
+        paths = [f"{self.bucket}/{obj}" for obj in objs]
 
-            # AttributeError is raised because we
-            # set self.events._response to None in Watcher.stop()
-            except AttributeError:
-                break
+        # Frames may differ in the number of signals
+        dataset = ds.dataset(paths, format="parquet", filesystem=fs)
+        schema = pa.unify_schemas(
+            [frag.physical_schema for frag in dataset.get_fragments()]
+        )
+        dataset = ds.dataset(
+            paths, schema=schema, format="parquet", filesystem=fs
+        )
+
+        index = None
+        if schema.pandas_metadata is not None:
+            for col in schema.pandas_metadata.get("index_columns", []):
+                if isinstance(col, str):
+                    index = col
+                    break
+
+        scan: dict = {}
+
+        if columns is not None:
+            scan["columns"] = list(columns)
+            if index is not None and index not in columns:
+                scan["columns"].append(index)
+
+        if index is not None and (start is not None or end is not None):
+            typ = schema.field(index).type
+            expr = ds.scalar(True)
+
+            if start is not None:
+                expr &= ds.field(index) >= pa.scalar(start, type=typ)
+            if end is not None:
+                expr &= ds.field(index) < pa.scalar(end, type=typ)
+
+            scan["filter"] = expr
+
+        return dataset, scan
+
+    def query_frames(
+        self,
+        prefix: str,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """Read the samples of a time range from multiple frame objects.
+
+        Only the required objects, columns and row groups are fetched.
+        Objects are read in parallel.
+
+        Args:
+          prefix: Prefix of the objects, e.g. the topic of a recorder
+          start: Only return samples at or after this time
+          end: Only return samples before this time
+          columns: Only return these columns
+
+        Returns:
+            A single DataFrame containing the samples ordered by time
+        """
+        objs = self.list_frames(prefix, start, end)
+        if not objs:
+            return pd.DataFrame(columns=columns)
+
+        dataset, scan = self._query(objs, start, end, columns)
+        df = dataset.to_table(use_threads=True, **scan).to_pandas()
+
+        return df.sort_index()
+
+    def query_batches(
+        self,
+        prefix: str,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        columns: list[str] | None = None,
+        batch_size: int = 128 * 1024,
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream the samples of a time range from multiple frame objects.
+
+        Args:
+          prefix: Prefix of the objects, e.g. the topic of a recorder
+          start: Only return samples at or after this time
+          end: Only return samples before this time
+          columns: Only return these columns
+          batch_size: Maximum number of rows per batch
+
+        Returns:
+            An iterator of PyArrow record batches in the order of the objects
+        """
+        objs = self.list_frames(prefix, start, end)
+        if not objs:
+            return
+
+        dataset, scan = self._query(objs, start, end, columns)
+
+        yield from dataset.to_batches(batch_size=batch_size, **scan)
+
+    def watch(
+        self,
+        prefix: str,
+        events: Event = Event.CREATED | Event.REMOVED,
+        initial: bool = False,
+    ):
+        """
+
+        Args:
+          prefix: str:
+          events: Event:  (Default value = Event.CREATED | Event.REMOVED)
+          initial: bool:  (Default value = False)
+
+        Returns:
+
+        """
+        queue: Queue[tuple[Event, str]] = Queue()
+
+        def cb(_client: Client, typ: Event, filename: str):
+            queue.put((typ, filename))
+
+        watcher = Watcher(self, prefix, cb, events, initial)
+
+        try:
+            while True:
+                yield queue.get()
+        finally:
+            watcher.stop()
+
+    def list_objects(self, prefix: str) -> dict[str, ObjectInfo]:
+        """List all objects below a prefix.
+
+        Args:
+          prefix: The prefix of the object names
+
+        Returns:
+            The state of each object by its name
+        """
+        return {
+            obj.object_name: ObjectInfo(
+                _strip_etag(obj.etag), obj.last_modified, obj.size
+            )
+            for obj in self.client.list_objects(
+                self.bucket, prefix=prefix, recursive=True
+            )
+        }
+
+    def watch_async(
+        self,
+        prefix: str,
+        cb: Callable[["Client", Event, str], None],
+        events=Event.CREATED | Event.REMOVED,
+        initial: bool = False,
+    ) -> "Watcher":
+        """
+
+        Args:
+          prefix: str:
+          cb: Callable[["Client":
+          Event:
+          str]:
+          None]:
+          events:  (Default value = Event.CREATED | Event.REMOVED)
+          initial: bool:  (Default value = False)
+
+        Returns:
+
+        """
+        return Watcher(self, prefix, cb, events, initial)
+
+    def index(
+        self, prefix: str, path: str | os.PathLike | None = None
+    ) -> "ObjectIndex":
+        """Get an index of the objects below a prefix which is kept
+        current from bucket notifications.
+
+        The index is shared by all callers and also used by new watchers
+        below the prefix instead of listing the objects.
+
+        Args:
+          prefix: The prefix of the indexed objects
+          path: Optional file in which the index is persisted
+
+        Returns:
+            The index
+        """
+        with self._notifications_lock:
+            watcher = self._indexes.get(prefix)
+
+        if watcher is None or not watcher.is_alive():
+            index = ObjectIndex(prefix, path)
+            watcher = Watcher(self, prefix, None, index=index)
+
+            with self._notifications_lock:
+                self._indexes[prefix] = watcher
+
+        return watcher.index
+
+    def notifications(self) -> "Multiplexer":
+        """Get the notification stream shared by all watchers.
+
+        Returns:
+            The multiplexer of the client
+        """
+        with self._notifications_lock:
+            mux = self._notifications
+            if mux is None or not mux.is_alive():
+                mux = self._notifications = Multiplexer(self)
 
-            if self._stopflag.is_set():
+            return mux
+
+
+class ObjectIndex:
+    """Index of the objects below a prefix
+
+    The index can be persisted to a file, so that changes which happened
+    while a service was not running can be detected after its restart.
+
+    Args:
+      prefix: The prefix of the indexed objects
+      path: Optional file in which the index is persisted
+      save_interval: Minimum interval in seconds between writes of the file
+
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        path: str | os.PathLike | None = None,
+        save_interval: float = 5,
+    ):
+        self.prefix = prefix
+        self.path = pathlib.Path(path) if path is not None else None
+        self.save_interval = save_interval
+        self.objects: dict[str, ObjectInfo] = {}
+
+        # True if the index has been loaded from its file
+        self.restored = False
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved = 0.0
+
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.objects
+
+    def get(self, filename: str) -> ObjectInfo | None:
+        return self.objects.get(filename)
+
+    def lookup(self, prefix: str | None = None) -> dict[str, ObjectInfo]:
+        """Look up the objects below a prefix.
+
+        Args:
+          prefix: The prefix of the object names. Defaults to the prefix
+                  of the index.
+
+        Returns:
+            The state of each object by its name
+        """
+        if prefix is None:
+            prefix = self.prefix
+
+        with self._lock:
+            return {
+                filename: info
+                for filename, info in self.objects.items()
+                if filename.startswith(prefix)
+            }
+
+    def names(self, prefix: str | None = None) -> list[str]:
+        """Get the sorted names of the objects below a prefix.
+
+        Args:
+          prefix: The prefix of the object names. Defaults to the prefix
+                  of the index.
+
+        Returns:
+            The object names
+        """
+        return sorted(self.lookup(prefix))
+
+    def sync(self, objects: dict[str, ObjectInfo]) -> list[tuple[Event, str]]:
+        """Replace the index with a listing of the objects.
+
+        Args:
+          objects: All objects currently below the prefix
+
+        Returns:
+            The objects which have been created, changed or removed
+        """
+        changes: list[tuple[Event, str]] = []
+
+        with self._lock:
+            for filename, info in objects.items():
+                known = self.objects.get(filename)
+                if known is None or known.changed(info):
+                    self.objects[filename] = info
+                    changes.append((Event.CREATED, filename))
+
+            for filename in list(self.objects):
+                if filename not in objects:
+                    del self.objects[filename]
+                    changes.append((Event.REMOVED, filename))
+
+            if changes:
+                self._changed()
+
+        return changes
+
+    def apply(self, typ: Event, filename: str, info: ObjectInfo) -> bool:
+        """Update the index from a bucket notification.
+
+        Args:
+          typ: The event type
+          filename: The object name
+          info: The state of the object
+
+        Returns:
+            True if the event changed the index
+        """
+        with self._lock:
+            if typ == Event.CREATED:
+                known = self.objects.get(filename)
+                if known is not None and not known.changed(info):
+                    return False
+
+                self.objects[filename] = info
+
+            elif typ == Event.REMOVED:
+                if self.objects.pop(filename, None) is None:
+                    return False
+
+            else:
+                return False
+
+            self._changed()
+
+        return True
+
+    def load(self):
+        """Read the index from its file."""
+        if self.path is None:
+            return
+
+        with open(self.path) as f:
+            state = json.load(f)
+
+        with self._lock:
+            self.objects = {
+                filename: ObjectInfo(
+                    etag,
+                    (
+                        datetime.datetime.fromisoformat(last_modified)
+                        if last_modified
+                        else None
+                    ),
+                    size,
+                )
+                for filename, (etag, last_modified, size) in state[
+                    "objects"
+                ].items()
+            }
+            self.restored = True
+
+    def save(self):
+        """Write the index to its file if it has been changed."""
+        if self.path is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            state = {
+                "prefix": self.prefix,
+                "objects": {
+                    filename: [
+                        info.etag,
+                        (
+                            info.last_modified.isoformat()
+                            if info.last_modified
+                            else None
+                        ),
+                        info.size,
+                    ]
+                    for filename, info in self.objects.items()
+                },
+            }
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+
+            os.replace(tmp, self.path)
+
+            self._dirty = False
+            self._saved = time.monotonic()
+
+    def _changed(self):
+        self._dirty = True
+
+        if time.monotonic() - self._saved >= self.save_interval:
+            self.save()
+
+
+class Watcher:
+    """Subscription of a callback to events of S3 objects below a prefix
+
+    All watchers of a client share a single notification stream and
+    thread. Raising StopIteration in the callback stops the watcher.
+
+    Each watcher lists its prefix on start and keeps an index of the
+    objects below it. Unless the existing objects are reported, this
+    baseline listing is silent. Events received while listing are always
+    reported. Whenever the stream has been reconnected, the prefix is
+    listed again and only the differences to the index are reported, so
+    that no events are missed or reported twice.
+
+    With a persisted index, changes since the last run are reported on
+    start instead of all objects.
+
+    Args:
+      client: The store client
+      prefix: The prefix of the watched objects
+      cb: The callback or None to only keep the index current
+      events: The event types which are reported to the callback
+      initial: Report all existing objects as created
+      index: The index of the watched objects
+
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        prefix: str,
+        cb: Callable[[Client, Event, str], None] | None,
+        events: Event = Event.CREATED | Event.REMOVED,
+        initial: bool = False,
+        index: ObjectIndex | None = None,
+    ):
+        self.cb = cb
+        self.client = client
+        self.prefix = prefix
+        self.events = events
+        self._stopflag = threading.Event()
+
+        self.index = index if index is not None else ObjectIndex(prefix)
+        self._lock = threading.RLock()
+
+        # Events received before the initial listing completed
+        self._pending: list[tuple[Event, str, ObjectInfo]] | None = []
+
+        # Subscribe before listing to not miss objects created in between
+        self._notifications = self.client.notifications()
+        self._notifications.subscribe(self)
+
+        try:
+            objects = self._notifications.lookup(prefix)
+            if objects is None:
+                objects = self.client.list_objects(prefix)
+
+            # Changes since the last run are reported for a persisted index
+            self._sync(
+                objects, baseline=not initial and not self.index.restored
+            )
+        except Exception:
+            self.stop()
+            raise
+
+    @property
+    def synced(self) -> bool:
+        return self._pending is None
+
+    def is_alive(self) -> bool:
+        return not self._stopflag.is_set()
+
+    def stop(self):
+        self._notifications.unsubscribe(self)
+        self._stopflag.set()
+        self.index.save()
+
+    def join(self, timeout: float | None = None):
+        """Wait until the watcher has been stopped.
+
+        Args:
+          timeout: Maximum time to wait in seconds
+
+        """
+        self._stopflag.wait(timeout)
+
+    def _sync(self, objects: dict[str, ObjectInfo], baseline: bool = False):
+        """Report the differences between a listing and the index.
+
+        Args:
+          objects: All objects currently below the prefix
+          baseline: Only update the index without reporting the listing.
+                    Events received in the meantime are reported even if
+                    the listing already contains their objects.
+
+        """
+        with self._lock:
+            for typ, filename in self.index.sync(objects):
+                if not baseline:
+                    self._emit(typ, filename)
+
+            pending, self._pending = self._pending, None
+            for typ, filename, info in pending or []:
+                if self.index.apply(typ, filename, info) or baseline:
+                    self._emit(typ, filename)
+
+    def _notify(self, typ: Event, filename: str, info: ObjectInfo):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((typ, filename, info))
+            else:
+                self._apply(typ, filename, info)
+
+    def _apply(self, typ: Event, filename: str, info: ObjectInfo):
+        if self.index.apply(typ, filename, info):
+            self._emit(typ, filename)
+
+    def _emit(self, typ: Event, filename: str):
+        if self.cb is None:
+            return
+
+        if typ not in self.events or self._stopflag.is_set():
+            return
+
+        try:
+            self.cb(self.client, typ, filename)
+        except StopIteration:
+            self.stop()
+        except Exception as e:
+            self.client.logger.exception(
+                "Watcher for %s failed to handle event: %s", self.prefix, e
+            )
+
+
+class PrefixTrie:
+    """Character trie which finds all watchers whose prefix matches an
+    object name."""
+
+    def __init__(self):
+        self.children: dict[str, PrefixTrie] = {}
+        self.watchers: list[Watcher] = []
+
+    def insert(self, prefix: str, watcher: Watcher):
+        node = self
+        for c in prefix:
+            node = node.children.setdefault(c, PrefixTrie())
+
+        node.watchers.append(watcher)
+
+    def remove(self, prefix: str, watcher: Watcher):
+        path = [self]
+        for c in prefix:
+            child = path[-1].children.get(c)
+            if child is None:
+                return
+
+            path.append(child)
+
+        node = path[-1]
+        if watcher in node.watchers:
+            node.watchers.remove(watcher)
+
+        # Prune branches without any watchers
+        for c, parent in zip(reversed(prefix), reversed(path[:-1])):
+            if node.watchers or node.children:
                 break
 
-            try:
-                typ, filename = _decode_event(event)
-                self.cb(self.client, typ, filename)
-            except StopIteration:
+            del parent.children[c]
+            node = parent
+
+    def match(self, name: str) -> list[Watcher]:
+        node = self
+        watchers = list(node.watchers)
+
+        for c in name:
+            child = node.children.get(c)
+            if child is None:
                 break
 
-        self.client.logger.debug("Stopped watcher")
+            node = child
+            watchers += node.watchers
+
+        return watchers
+
+    def prefixes(self) -> Iterator[str]:
+        if self.watchers:
+            yield ""
+
+        for c, child in self.children.items():
+            for prefix in child.prefixes():
+                yield c + prefix
+
+    def roots(self) -> Iterator[str]:
+        """Get the prefixes which are not covered by a shorter one."""
+        if self.watchers:
+            yield ""
+            return
+
+        for c, child in self.children.items():
+            for prefix in child.roots():
+                yield c + prefix
+
+    def __iter__(self) -> Iterator[Watcher]:
+        yield from self.watchers
+
+        for child in self.children.values():
+            yield from child
+
+
+class _StreamPool(urllib3.PoolManager):
+    """Connection pool of a single bucket notification stream.
+
+    The event iterator of minio silently reopens a stream which ended, so
+    that events in between are missed. Its request is sent through this
+    pool which opens the stream only once. Any further request fails, so
+    that the Multiplexer reconnects and reconciles the missed events
+    itself.
+
+    Args:
+      on_open: Called once the stream has been opened
+      **kwargs: Arguments of the connection pools
+
+    """
+
+    def __init__(self, on_open: Callable[[], None], **kwargs):
+        super().__init__(**kwargs)
+
+        self.on_open = on_open
+        self.response: urllib3.BaseHTTPResponse | None = None
+
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def urlopen(
+        self, method: str, url: str, *args, **kw
+    ) -> urllib3.BaseHTTPResponse:
+        with self._lock:
+            if self._closed or self.response is not None:
+                raise ConnectionError("Notification stream has been closed")
+
+        response = super().urlopen(method, url, *args, **kw)
+
+        with self._lock:
+            self.response = response
+            closed = self._closed
+
+        if closed:
+            response.close()
+            raise ConnectionError("Notification stream has been closed")
+
+        if response.status == 200:
+            self.on_open()
+
+        return response
+
+    def close(self):
+        """Close the stream and interrupt a blocking read."""
+        with self._lock:
+            self._closed = True
+            response = self.response
+
+        if response is not None:
+            response.close()
+
+        self.clear()
+
+
+class Multiplexer(threading.Thread):
+    """Single bucket notification stream shared by all watchers of a client
+
+    The stream listens on the longest common prefix of all watchers and is
+    only reopened if a new watcher is not covered by it. Received events
+    are dispatched to the watchers by a prefix trie.
+
+    A failed stream is reconnected with exponential backoff. After each
+    (re)connect the watchers are reconciled with a fresh listing.
+
+    Args:
+      client: The store client
+      min_backoff: Initial delay in seconds before reconnecting
+      max_backoff: Maximum delay in seconds before reconnecting
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        min_backoff: float = 1,
+        max_backoff: float = 60,
+    ):
+        super().__init__(name="store-notifications", daemon=True)
+
+        self.client = client
+        self.logger = client.logger
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self._trie = PrefixTrie()
+        self._prefix: str | None = None
+        self._stream: _StreamPool | None = None
+        self._backoff = min_backoff
+        self._cond = threading.Condition()
+        self._stopflag = threading.Event()
+
+        self.start()
+
+    def subscribe(self, watcher: Watcher):
+        with self._cond:
+            self._trie.insert(watcher.prefix, watcher)
+
+            prefix = watcher.prefix
+            if self._prefix is not None:
+                prefix = posixpath.commonprefix([self._prefix, prefix])
+
+            if prefix != self._prefix:
+                self.logger.debug("Listening on prefix '%s'", prefix)
+                self._prefix = prefix
+                self._restart()
+
+            self._cond.notify()
+
+    def unsubscribe(self, watcher: Watcher):
+        with self._cond:
+            self._trie.remove(watcher.prefix, watcher)
+
+            if not self._trie.watchers and not self._trie.children:
+                self._prefix = None
+                self._restart()
 
     def stop(self):
-        self._stopflag.set()
-        self.events._close_response()
-        self.join()
+        with self._cond:
+            self._stopflag.set()
+            self._restart()
+            self._cond.notify()
 
+        if threading.current_thread() is not self:
+            self.join()
+
+    def _restart(self):
+        # Interrupts a blocking read of the current stream. It is replaced
+        # first, so that run() does not take the interruption as a failure.
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.close()
+
+    def run(self):
+        self.logger.debug("Started watcher")
 
-def _decode_event(event) -> tuple[Event, str]:
+        while True:
+            with self._cond:
+                while self._prefix is None and not self._stopflag.is_set():
+                    self._cond.wait()
+
+                if self._stopflag.is_set() or self._prefix is None:
+                    break
+
+                prefix = self._prefix
+                stream = self._stream = _StreamPool(
+                    self._opened, **self.client.http_client.connection_pool_kw
+                )
+
+            try:
+                with self._listen(stream, prefix) as events:
+                    for event in events:
+                        if stream is not self._stream:
+                            break
+
+                        self._dispatch(*_decode_event(event))
+
+            # Raised by the closed stream after _restart() or when it ended
+            except Exception as e:
+                if stream is self._stream and not self._stopflag.is_set():
+                    self.logger.warning(
+                        "Notification stream failed: %s. "
+                        "Reconnecting in %.0f s",
+                        e,
+                        self._backoff,
+                    )
+
+                    self._stopflag.wait(self._backoff)
+                    self._backoff = min(self._backoff * 2, self.max_backoff)
+
+        self.logger.debug("Stopped watcher")
+
+    def _listen(self, stream: "_StreamPool", prefix: str) -> Any:
+        client = minio.Minio(
+            endpoint=self.client.endpoint,
+            region=self.client.region,
+            credentials=self.client.creds,
+            http_client=stream,
+        )
+
+        return client.listen_bucket_notification(
+            self.client.bucket,
+            prefix=prefix,
+            events=_s3_events(Event.CREATED | Event.REMOVED),
+        )
+
+    def _opened(self):
+        self._backoff = self.min_backoff
+
+        # Catch up with changes while the stream was closed
+        self._reconcile()
+
+    def _reconcile(self):
+        # Watchers which are still taking their initial listing are
+        # reconciled by it
+        with self._cond:
+            synced = PrefixTrie()
+            for watcher in self._trie:
+                if watcher.synced:
+                    synced.insert(watcher.prefix, watcher)
+
+        objects: dict[str, ObjectInfo] = {}
+        for root in synced.roots():
+            objects.update(self.client.list_objects(root))
+
+        with self._cond:
+            listings: dict[Watcher, dict[str, ObjectInfo]] = {
+                watcher: {} for watcher in self._trie if watcher.synced
+            }
+
+            for filename, info in objects.items():
+                for watcher in self._trie.match(filename):
+                    if watcher in listings:
+                        listings[watcher][filename] = info
+
+        for watcher, listing in listings.items():
+            watcher._sync(listing)
+
+    def lookup(self, prefix: str) -> dict[str, ObjectInfo] | None:
+        """Look up objects in an index which is kept current.
+
+        Args:
+          prefix: The prefix of the object names
+
+        Returns:
+            The state of each object by its name or None if no index
+            covers the prefix
+        """
+        with self._cond:
+            for watcher in self._trie.match(prefix):
+                if watcher.cb is None and watcher.synced:
+                    return watcher.index.lookup(prefix)
+
+        return None
+
+    def _dispatch(self, typ: Event, filename: str, info: ObjectInfo):
+        with self._cond:
+            watchers = self._trie.match(filename)
+
+            # Indexes are updated under the lock to keep lookup() consistent
+            for watcher in watchers:
+                if watcher.cb is None:
+                    watcher._notify(typ, filename, info)
+
+        for watcher in watchers:
+            if watcher.cb is not None:
+                watcher._notify(typ, filename, info)
+
+
+class AsyncClient:
+    """Asyncio-native client for the S3 object store of the SEGuRo platform
+
+    All operations are performed by non-blocking I/O on the event loop so
+    that many of them can run concurrently without occupying a thread each.
+    Only the renewal of temporary credentials and the (de)serialization of
+    frames are offloaded to the default executor.
+
+    The synchronous client is used for authentication and presigning.
+    Its construction blocks, so create an AsyncClient outside of the event
+    loop or via ``await asyncio.to_thread(AsyncClient)``. Changes of objects
+    are received from the notification stream of the synchronous client.
+
+    Args:
+        client: The synchronous client whose connection settings and
+                credentials are used. A new one is created if omitted.
     """
 
+    def __init__(self, client: Client | None = None):
+        self.sync = client if client is not None else Client()
+        self.bucket = self.sync.bucket
+        self.logger = self.sync.logger
+
+        self._fs: s3fs.S3FileSystem | None = None
+        self._fs_creds: minio.credentials.Credentials | None = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Close all connections of the client."""
+        if self._fs is not None:
+            s3 = await self._fs.set_session()
+            await s3.close()
+
+            self._fs = None
+
+    async def credentials(self) -> minio.credentials.Credentials:
+        """Get temporary credentials and renew them ahead of their expiry.
+
+        Returns:
+            The current credentials
+        """
+        creds = self._fs_creds
+        if (
+            creds is None
+            or creds.is_expired()
+            or self.sync.creds.needs_renewal()
+        ):
+            creds = await asyncio.to_thread(self.sync.credentials)
+
+        return creds
+
+    async def filesystem(self) -> s3fs.S3FileSystem:
+        """Get an asynchronous fsspec filesystem for the store.
+
+        Paths are of the form "<bucket>/<object name>".
+
+        Returns:
+            The filesystem
+        """
+        creds = await self.credentials()
+
+        if self._fs is None or creds is not self._fs_creds:
+            # Connections of the previous filesystem are closed by s3fs
+            # once it is no longer referenced
+            self._fs = s3fs.S3FileSystem(
+                asynchronous=True, **self.sync._filesystem_args(creds)
+            )
+            self._fs_creds = creds
+
+        return self._fs
+
+    async def get_file(self, filename: str, file: str):
+        """Download file from the S3 object store and store it locally.
+
+        Args:
+          filename: Local filename that is used
+          file: Name of requested file in storage
+
+        """
+        fs = await self.filesystem()
+        await fs._get_file(f"{self.bucket}/{file}", filename)
+
+    async def put_file(self, filename: str, file: str):
+        """Upload local file and store it in the S3Storage.
+
+        Args:
+          filename: Name of uploaded file in storage
+          file: Local file that is used
+
+        """
+        fs = await self.filesystem()
+        await fs._put_file(file, f"{self.bucket}/{filename}")
+
+    async def remove_file(self, filename: str):
+        """Remove a file from the S3Storage.
+
+        Args:
+          filename: Name of removed file in storage
+
+        """
+        fs = await self.filesystem()
+        await fs._rm_file(f"{self.bucket}/{filename}")
+
+    async def put_file_contents(self, filename: str, content: bytes):
+        """Write the contents of a file in the S3Storage.
+
+        Args:
+          filename: Name of file in storage
+          content: Content that is written to file
+
+        """
+        fs = await self.filesystem()
+        await fs._pipe_file(f"{self.bucket}/{filename}", content)
+
+    async def get_file_contents(self, filename: str) -> bytes:
+        """Read the contents of a file in the S3Storage.
+
+        Args:
+          filename: Name of file in storage
+
+        Returns:
+            The contents of the file
+        """
+        fs = await self.filesystem()
+        return await fs._cat_file(f"{self.bucket}/{filename}")
+
+    async def list_objects(self, prefix: str) -> list[str]:
+        """List the names of all objects below a prefix.
+
+        Args:
+          prefix: The prefix of the object names
+
+        Returns:
+            The object names
+        """
+        fs = await self.filesystem()
+
+        directory, _, rest = prefix.rpartition("/")
+        path = posixpath.join(self.bucket, directory)
+
+        return [
+            name.removeprefix(f"{self.bucket}/")
+            for name in await fs._find(path, prefix=rest)
+        ]
+
+    async def get_file_url(
+        self,
+        filename: str,
+        expires=datetime.timedelta(days=7),
+        public: bool = True,
+    ) -> str:
+        return await asyncio.to_thread(
+            self.sync.get_file_url, filename, expires, public
+        )
+
+    async def put_frame(self, filename: str, df: pd.DataFrame, **kwargs):
+        """Upload a Pandas Dataframe as a Parquet file to the store
+
+        Args:
+          filename: The filename at which it should be stored
+          df: The Pandas DataFrame
+          **kwargs: Additional arguments for the Parquet writer
+
+        """
+        buf = io.BytesIO()
+        await asyncio.to_thread(
+            functools.partial(df.to_parquet, buf, compression="zstd", **kwargs)
+        )
+
+        await self.put_file_contents(filename, buf.getvalue())
+
+    async def get_frame(self, filename: str) -> pd.DataFrame:
+        """Download a Pandas Dataframe as a Parquet file to the store
+
+        Args:
+          filename: The filename from which it should be retrieved
+
+        Returns:
+            The Pandas DataFrame
+        """
+        content = await self.get_file_contents(filename)
+
+        return await asyncio.to_thread(pd.read_parquet, io.BytesIO(content))
+
+    async def watch(
+        self,
+        prefix: str,
+        events: Event = Event.CREATED | Event.REMOVED,
+        initial: bool = False,
+    ) -> AsyncGenerator[tuple[Event, str], None]:
+        """Watch for changes of objects below a prefix.
+
+        Args:
+          prefix: The prefix of the object names
+          events: The types of events to watch for
+          initial: Start with a CREATED event for each existing object
+
+        Returns:
+            An asynchronous iterator of event types and object names
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[tuple[Event, str]] = asyncio.Queue()
+
+        def cb(_client: Client, typ: Event, filename: str):
+            loop.call_soon_threadsafe(queue.put_nowait, (typ, filename))
+
+        # Subscribing lists the objects for the initial events
+        watcher = await asyncio.to_thread(
+            Watcher, self.sync, prefix, cb, events, initial
+        )
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            watcher.stop()
+
+
+def _s3_events(events: Event) -> tuple[str, ...]:
+    s3_events = []
+    if Event.CREATED in events:
+        s3_events.append("s3:ObjectCreated:*")
+    if Event.REMOVED in events:
+        s3_events.append("s3:ObjectRemoved:*")
+
+    return tuple(s3_events)
+
+
+def _decode_event(event) -> tuple[Event, str, ObjectInfo]:
+    """Decode a bucket notification.
+
     Args:
-      event:
+      event: The notification as received from the store
 
     Returns:
-
+        The event type, object name and state of the object
     """
     records = event.get("Records")
     record = records[0]
@@ -386,7 +2086,8 @@ def _decode_event(event) -> tuple[Event, str]:
     s3: dict = record.get("s3", {})
     obj = s3.get("object", {})
 
-    filename: str = obj.get("key")
+    # Object keys are URL-encoded in notifications
+    filename: str = urllib.parse.unquote(obj.get("key"))
 
     if event_name.startswith("s3:ObjectCreated"):
         typ = Event.CREATED
@@ -395,4 +2096,29 @@ def _decode_event(event) -> tuple[Event, str]:
     else:
         typ = Event.UNKNOWN
 
-    return typ, filename
+    event_time = record.get("eventTime")
+    info = ObjectInfo(
+        etag=_strip_etag(obj.get("eTag")),
+        last_modified=(
+            datetime.datetime.fromisoformat(event_time) if event_time else None
+        ),
+        size=obj.get("size"),
+    )
+
+    return typ, filename, info
+
+
+def _response_error(
+    resp: urllib3.BaseHTTPResponse,
+) -> minio.error.MinioException:
+    """Get the error which the minio client raises for a failed request."""
+    if resp.data and "xml" in resp.headers.get("Content-Type", ""):
+        return minio.error.S3Error.fromxml(resp)
+
+    return minio.error.ServerError(
+        f"server failed with HTTP status code {resp.status}", resp.status
+    )
+
+
+def _strip_etag(etag: str | None) -> str | None:
+    return etag.strip('"') if etag else None
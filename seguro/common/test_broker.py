@@ -4,8 +4,28 @@
 
 import time
 import pytest
+import socket
+import asyncio
+import threading
+import functools as ft
+import numpy as np
+import paho.mqtt.client as mqtt
 
-from seguro.common.broker import Client, Sample, Timestamp, Message
+from seguro.common.broker import (
+    AsyncClient,
+    BatchPublisher,
+    BufferedMessageInfo,
+    Client,
+    Sample,
+    Timestamp,
+    Message,
+    Dispatcher,
+    Overflow,
+    Protobuf,
+    Route,
+    SampleBlock,
+    TopicRouter,
+)
 
 
 @pytest.mark.broker
@@ -90,3 +110,457 @@ def test_broker_samples():
     assert smps_recv == smps_send
     assert len(topics_recv) == 1
     assert topics_recv[0] == "mytopic"
+
+
+@pytest.mark.broker
+def test_broker_shared():
+    received: dict[str, list[bytes]] = {"a": [], "b": []}
+
+    clients = {}
+    for name in received:
+
+        def callback(b: Client, msg: Message, name=name):
+            received[name].append(msg.payload)
+
+        clients[name] = Client("pytest-broker")
+        clients[name].subscribe("shared/#", callback, group="pytest")
+
+    time.sleep(0.5)
+
+    for i in range(10):
+        clients["a"].publish(f"shared/{i}", str(i))
+
+    time.sleep(1)
+
+    # Each message is only received by one client of the group
+    assert sorted(received["a"] + received["b"]) == sorted(
+        str(i).encode() for i in range(10)
+    )
+
+
+@pytest.mark.broker
+def test_broker_reconnect():
+    broker = Client("pytest-broker", min_backoff=1)
+
+    messages: list[Message] = []
+
+    def callback(b: Client, msg: Message):
+        messages.append(msg)
+
+    broker.subscribe("reconnect", callback)
+    time.sleep(0.5)
+
+    # Simulate a lost connection
+    sock = broker.client.socket()
+    assert isinstance(sock, socket.socket)
+    sock.shutdown(socket.SHUT_RDWR)
+    time.sleep(0.2)
+
+    # Messages are buffered until reconnected
+    info = broker.publish("reconnect", "During outage")
+    assert isinstance(info, BufferedMessageInfo)
+    assert broker.stats()["buffered"] == 1
+
+    time.sleep(2)
+
+    stats = broker.stats()
+    assert stats["connected"]
+    assert stats["disconnects"] == 1
+    assert stats["buffered"] == 0
+
+    # The subscription has been restored
+    broker.publish("reconnect", "After outage")
+    time.sleep(0.5)
+
+    assert [msg.payload for msg in messages] == [
+        b"During outage",
+        b"After outage",
+    ]
+
+
+@pytest.mark.broker
+def test_broker_persistent():
+    messages: list[Message] = []
+
+    def callback(b: Client, msg: Message):
+        messages.append(msg)
+
+    sub = Client("pytest-persistent", persistent=True, qos=1)
+    sub.subscribe("persistent", callback)
+    time.sleep(0.5)
+
+    sub.client.disconnect()
+    sub.stop_listening()
+
+    # Messages are queued by the broker while the subscriber is offline
+    pub = Client("pytest-broker", qos=1)
+    pub.publish("persistent", "Hello again!").wait_for_publish(5)
+
+    sub = Client("pytest-persistent", persistent=True, qos=1)
+    time.sleep(0.5)
+    sub.subscribe("persistent", callback)
+    time.sleep(0.5)
+
+    assert [msg.payload for msg in messages] == [b"Hello again!"]
+
+
+@pytest.mark.broker
+def test_batch_publisher():
+    broker = Client("pytest-broker")
+
+    received: list[list[Sample]] = []
+
+    def callback(b: Client, topic: str, samples: list[Sample]):
+        received.append(samples)
+
+    broker.subscribe_samples("mytopic", callback)
+    time.sleep(0.5)
+
+    publisher = BatchPublisher(broker, max_samples=4, linger=0.5)
+
+    smps = [Sample(sequence=i + 1, data=[float(i)]) for i in range(10)]
+    for smp in smps:
+        publisher.publish_samples("mytopic", [smp])
+
+    # Two full batches are published immediately
+    time.sleep(0.2)
+    assert [len(samples) for samples in received] == [4, 4]
+
+    # The remainder after the linger time
+    time.sleep(1)
+    assert [len(samples) for samples in received] == [4, 4, 2]
+    assert sum(received, []) == smps
+
+    publisher.close()
+
+    assert publisher.stats() == {"published": 10, "batches": 3, "pending": 0}
+
+
+@pytest.mark.broker
+def test_batch_publisher_block():
+    broker = Client("pytest-broker")
+
+    received: list[list[Sample]] = []
+
+    def callback(b: Client, topic: str, samples: list[Sample]):
+        received.append(samples)
+
+    broker.subscribe_samples("mytopic", callback)
+    time.sleep(0.5)
+
+    publisher = BatchPublisher(broker, max_samples=4, linger=0.5)
+
+    smps = [Sample(sequence=i + 1, data=[float(i), i]) for i in range(9)]
+    publisher.publish_samples("mytopic", smps[:2])
+    publisher.publish_block("mytopic", SampleBlock.from_samples(smps[2:]))
+
+    # Samples and rows of the block are published in the same batch
+    time.sleep(0.2)
+    assert [len(samples) for samples in received] == [4, 4]
+
+    time.sleep(1)
+    assert [len(samples) for samples in received] == [4, 4, 1]
+    assert sum(received, []) == smps
+    assert all(type(smp.data[1]) is int for smp in sum(received, []))
+
+    publisher.close()
+
+    assert publisher.stats() == {"published": 9, "batches": 3, "pending": 0}
+
+
+@pytest.mark.broker
+def test_async_broker():
+    async def run():
+        async with AsyncClient("pytest-broker") as broker:
+            messages = broker.messages("mytopic/#", qos=1)
+
+            async def receive(n: int) -> list[Message]:
+                return [await anext(messages) for _ in range(n)]
+
+            received = asyncio.ensure_future(receive(16))
+            await asyncio.sleep(0.5)
+
+            await asyncio.gather(
+                *[
+                    broker.publish(f"mytopic/{i % 4}", str(i), qos=1)
+                    for i in range(16)
+                ]
+            )
+
+            msgs = await asyncio.wait_for(received, 5)
+            await messages.aclose()
+
+        assert len(msgs) == 16
+        assert sorted(int(msg.payload) for msg in msgs) == list(range(16))
+
+        for i in range(4):
+            payloads = [
+                int(msg.payload) for msg in msgs if msg.topic == f"mytopic/{i}"
+            ]
+            assert payloads == list(range(i, 16, 4))
+
+    asyncio.run(run())
+
+
+@pytest.mark.broker
+def test_async_broker_disconnect():
+    async def run():
+        async with AsyncClient("pytest-broker") as broker:
+            # Simulate a lost connection
+            sock = broker.client.socket()
+            assert isinstance(sock, socket.socket)
+            sock.shutdown(socket.SHUT_RDWR)
+            await asyncio.sleep(0.2)
+
+            # Publications fail instead of waiting for a reconnect
+            for qos in [0, 1]:
+                with pytest.raises(ConnectionError):
+                    await asyncio.wait_for(
+                        broker.publish("mytopic", "Lost", qos=qos), 1
+                    )
+
+    asyncio.run(run())
+
+
+def test_sample_block():
+    smps = [
+        Sample(
+            ts_origin=Timestamp(123456780, 5),
+            ts_received=Timestamp(123456781),
+            sequence=4,
+            new_frame=True,
+            data=[1.0, 2.0, True, 42, complex(-1, 2)],
+        ),
+        Sample(
+            ts_origin=Timestamp(123456789),
+            sequence=5,
+            data=[3.0, 4.0],
+        ),
+    ]
+
+    block = SampleBlock.from_protobuf(Protobuf().dumpb(smps))
+
+    assert len(block) == 2
+    assert block.ts_origin[0] == np.datetime64(123456780_000000005, "ns")
+    assert np.isnat(block.ts_received[1])
+    assert list(block.sequence) == [4, 5]
+    assert list(block.new_frame) == [True, False]
+    assert list(block.length) == [5, 2]
+
+    assert block.values.shape == (2, 5)
+    assert block.values.dtype == np.complex128
+    assert block.values[0, 4] == complex(-1, 2)
+    assert np.isnan(block.values[1, 2:]).all()
+
+    assert block.to_samples() == smps
+    assert Protobuf().loadb(block.to_protobuf()) == smps
+
+    # VILLASnode encodes booleans as integers, so check the value types on
+    # blocks which have been encoded by SampleBlock itself
+    encoded = SampleBlock.from_samples(smps)
+    decoded = SampleBlock.from_protobuf(encoded.to_protobuf())
+
+    assert list(encoded.kinds[0]) == [b"f", b"f", b"b", b"i", b"z"]
+    assert list(decoded.kinds[0]) == [b"f", b"f", b"b", b"i", b"z"]
+
+    types = [float, float, bool, int, complex]
+    for decoded_smps in [
+        encoded.to_samples(),
+        decoded.to_samples(),
+        Protobuf().loadb(encoded.to_protobuf()),
+    ]:
+        assert decoded_smps == smps
+        assert [type(v) for v in decoded_smps[0].data] == types
+        assert [type(v) for v in decoded_smps[1].data] == [float, float]
+
+
+def message(topic: str, payload: bytes) -> Message:
+    msg = Message(topic=topic.encode())
+    msg.payload = payload
+
+    return msg
+
+
+def test_dispatcher():
+    received: dict[str, list[bytes]] = {}
+
+    def callback(msg: Message):
+        if msg.payload == b"fail":
+            raise RuntimeError("Callback failed")
+
+        received.setdefault(msg.topic, []).append(msg.payload)
+
+    d = Dispatcher(callback, workers=3, queue_size=4)
+
+    topics = [f"data/{i}" for i in range(8)]
+    for i in range(100):
+        for topic in topics:
+            d.submit(message(topic, str(i).encode()))
+
+    d.submit(message("data/0", b"fail"))
+    d.stop()
+
+    # Messages of each topic are processed in order
+    expected = [str(i).encode() for i in range(100)]
+    assert received == {topic: expected for topic in topics}
+
+    stats = d.stats()
+    assert stats["submitted"] == 801
+    assert stats["dispatched"] == 800
+    assert stats["failed"] == 1
+    assert stats["dropped"] == 0
+    assert stats["max_depth"] <= 4
+
+
+def test_dispatcher_drop():
+    received: list[bytes] = []
+    release = threading.Event()
+
+    def callback(msg: Message):
+        release.wait()
+        received.append(msg.payload)
+
+    d = Dispatcher(callback, queue_size=1, overflow=Overflow.DROP)
+
+    # Wait until the worker is busy with the first message
+    d.submit(message("data/0", b"0"))
+    while d.queues[0].qsize() > 0:
+        time.sleep(0.01)
+
+    d.submit(message("data/0", b"1"))
+    d.submit(message("data/0", b"2"))
+
+    release.set()
+    d.stop()
+
+    assert received == [b"0", b"1"]
+    assert d.stats()["dropped"] == 1
+
+
+def test_dispatcher_shared():
+    received: list[tuple[str, bytes]] = []
+    stopped = threading.Event()
+
+    d = Dispatcher(workers=2)
+
+    def callback(name: str, msg: Message):
+        received.append((name, msg.payload))
+
+        # Stopping from a callback must not wait for the calling thread
+        if msg.payload == b"stop":
+            d.stop()
+            stopped.set()
+
+    for i in range(10):
+        for name in ["a", "b"]:
+            d.submit(
+                message("data/0", str(i).encode()),
+                ft.partial(callback, name),
+                lane=name,
+            )
+
+    d.submit(message("data/0", b"stop"), ft.partial(callback, "a"))
+
+    assert stopped.wait(5)
+    for worker in d.workers:
+        worker.join(5)
+        assert not worker.is_alive()
+
+    # Messages of each subscription are processed in order
+    for name in ["a", "b"]:
+        expected = [str(i).encode() for i in range(10)]
+        assert [p for n, p in received if n == name][:10] == expected
+
+    assert len(received) == 21
+
+
+def test_dispatcher_stop_full():
+    received: list[bytes] = []
+    queued = threading.Event()
+    stopped = threading.Event()
+
+    d = Dispatcher(queue_size=1)
+
+    def callback(msg: Message):
+        received.append(msg.payload)
+
+        # Stopping while the lane of the calling worker is full
+        if msg.payload == b"0":
+            queued.wait(5)
+            d.stop()
+            stopped.set()
+
+    d.submit(message("data/0", b"0"), callback)
+    while d.queues[0].qsize() > 0:
+        time.sleep(0.01)
+
+    d.submit(message("data/0", b"1"), callback)
+    queued.set()
+
+    assert stopped.wait(5)
+
+    d.workers[0].join(5)
+    assert not d.workers[0].is_alive()
+
+    # Queued messages are still processed
+    assert received == [b"0", b"1"]
+
+
+def test_topic_router():
+    router = TopicRouter(cache_size=4)
+
+    matched: list[str] = []
+
+    def route(name: str) -> Route:
+        def cb(msg: Message):
+            matched.append(name)
+
+        return cb
+
+    filters = [
+        "#",
+        "+",
+        "a",
+        "a/#",
+        "a/+",
+        "a/b",
+        "a/+/c",
+        "+/+/c",
+        "+/b/#",
+        "a//c",
+        "$SYS/#",
+    ]
+    for topic_filter in filters:
+        router.insert(topic_filter, route(topic_filter))
+
+    topics = ["a", "b", "a/b", "a/b/c", "x/b/c", "a//c", "a/b/c/d", "$SYS/x"]
+
+    def matches(topic: str) -> set[str]:
+        matched.clear()
+        for cb in router.match(topic):
+            cb(message(topic, b""))
+
+        return set(matched)
+
+    for _ in range(2):  # Once uncached, once cached
+        for topic in topics:
+            assert matches(topic) == {
+                f for f in filters if mqtt.topic_matches_sub(f, topic)
+            }
+
+    router.remove("a/#")
+    router.remove("#")
+    assert matches("a/b/c/d") == {"+/b/#"}
+
+    router.insert("a/b/c/d", route("new"))
+    assert matches("a/b/c/d") == {"+/b/#", "new"}
+
+    for topic_filter in filters + ["a/b/c/d"]:
+        router.remove(topic_filter)
+
+    # Removing unknown filters is a no-op
+    router.remove("a/b")
+    router.remove("x/y/z")
+
+    for topic in topics:
+        assert router.match(topic) == ()
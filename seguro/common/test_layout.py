@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: 2023-2024 Steffen Vogel, OPAL-RT Germany GmbH
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime
+
+from villas.node.sample import Timestamp
+
+from seguro.common.layout import (
+    Layout,
+    object_name,
+    object_time,
+    object_topic,
+    select_frames,
+)
+
+
+def test_layout():
+    ts = Timestamp(seconds=1700000000, nanoseconds=0)
+
+    flat = object_name("data/test", ts)
+    hive = object_name("data/test", ts, layout=Layout.HIVE)
+
+    assert object_topic(flat) == "data/test"
+    assert object_topic(hive) == "data/test"
+    assert "/date=" in hive and "/hour=" in hive
+    assert object_time(flat) == object_time(hive) == ts.datetime()
+
+
+def test_select_frames():
+    # Frames of the recorder starting every minute
+    names = [
+        object_name("data/test", Timestamp(seconds=1704067200 + 60 * i))
+        for i in range(3)
+    ] + [
+        object_name(
+            "data/other",
+            Timestamp(seconds=1704067200),
+            layout=Layout.HIVE,
+        ),
+        "data/test/untimed.parquet",
+    ]
+
+    assert select_frames(names) == [names[i] for i in (3, 0, 1, 2, 4)]
+
+    # The last frame of a topic may contain samples up to now.
+    # Naive timestamps are in UTC.
+    start = datetime.datetime(2024, 1, 1, 0, 1, 30)
+    end = datetime.datetime(2024, 1, 1, 0, 2, 0)
+
+    assert select_frames(names, start, end) == [names[i] for i in (3, 1, 4)]
+
+    # Timestamps of other timezones are converted
+    cet = datetime.timezone(datetime.timedelta(hours=1))
+    start = datetime.datetime(2024, 1, 1, 1, 1, 30, tzinfo=cet)
+    end = datetime.datetime(2024, 1, 1, 1, 2, 0, tzinfo=cet)
+
+    assert select_frames(names, start, end) == [names[i] for i in (3, 1, 4)]
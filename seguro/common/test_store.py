@@ -3,12 +3,29 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+import asyncio
+import datetime
+import time
+import functools
 import threading
 import pytest
 import urllib3
 import pandas as pd
-
-from seguro.common.store import Client, Event
+import minio.credentials
+
+from seguro.common.store import (
+    AsyncClient,
+    CertificateProvider,
+    Client,
+    ContentCache,
+    Event,
+    ExpiringCredentials,
+    ObjectIndex,
+    ObjectInfo,
+    PrefixTrie,
+    RenewingProvider,
+    Watcher,
+)
 from seguro.common import config
 
 
@@ -118,6 +135,35 @@ def test_frame():
     assert df1.equals(df2)
 
 
+@pytest.mark.store
+def test_frame_chunks():
+    store = Client()
+
+    index = pd.date_range("2024-01-01", periods=1000, freq="1s")
+    df1 = pd.DataFrame({"a": range(1000), "b": 2.0}, index)
+
+    chunks = (df1[i:][:100] for i in range(0, 1000, 100))
+
+    store.put_frame_chunks("test_frame_chunks.parquet", chunks)
+
+    result = list(
+        store.get_frame_chunks(
+            "test_frame_chunks.parquet", columns=["a"], batch_size=250
+        )
+    )
+
+    # Batches are not merged across row groups
+    assert all(len(chunk) <= 250 for chunk in result)
+    assert all(list(chunk.columns) == ["a"] for chunk in result)
+    assert pd.concat(result)["a"].equals(df1["a"])
+
+    # No object is created without chunks
+    store.put_frame_chunks("test_frame_chunks_empty.parquet", [])
+
+    with pytest.raises(FileNotFoundError):
+        store.get_frame("test_frame_chunks_empty.parquet")
+
+
 @pytest.mark.store
 def test_presigned_url():
     store = Client()
@@ -152,3 +198,448 @@ def test_presigned_url_public():
 
     assert resp.status == 200
     assert resp.data == b"Hello World"
+
+
+@pytest.mark.store
+def test_query_frames():
+    store = Client()
+
+    index = pd.date_range("2024-01-01T00:00:00", periods=120, freq="1s")
+    df = pd.DataFrame({"sequence": range(120), "signal0": 1.0}, index)
+
+    for obj in store.list_frames("test_query/"):
+        store.remove_file(obj)
+
+    store.put_frame("test_query/2024-01-01T00:00:00.parquet", df[:60])
+    store.put_frame("test_query/2024-01-01T00:01:00.parquet", df[60:])
+
+    start = datetime.datetime(2024, 1, 1, 0, 0, 30)
+    end = datetime.datetime(2024, 1, 1, 0, 1, 30)
+
+    assert len(store.list_frames("test_query/", start, end)) == 2
+    assert len(store.list_frames("test_query/", end=start)) == 1
+
+    df2 = store.query_frames("test_query/", start, end, columns=["signal0"])
+
+    assert list(df2.columns) == ["signal0"]
+    assert df2.index.equals(df.index[30:90])
+
+    batches = store.query_batches("test_query/", start, end, batch_size=10)
+
+    assert sum(batch.num_rows for batch in batches) == 60
+
+
+@pytest.mark.store
+def test_put_many():
+    store = Client()
+
+    objects = {
+        f"test_put_many/{i}.txt": f"object {i}".encode() for i in range(8)
+    }
+
+    results = store.put_many(objects, max_workers=4)
+
+    assert [res.filename for res in results] == list(objects.keys())
+    assert all(res.error is None for res in results)
+
+    for filename, contents in objects.items():
+        assert store.get_file_contents(filename).data == contents
+        store.remove_file(filename)
+
+
+@pytest.mark.store
+def test_async_client():
+    async def run():
+        async with AsyncClient() as store:
+            filenames = [f"test_async/{i}.txt" for i in range(16)]
+
+            await asyncio.gather(
+                *[
+                    store.put_file_contents(filename, filename.encode())
+                    for filename in filenames
+                ]
+            )
+
+            contents = await asyncio.gather(
+                *[store.get_file_contents(filename) for filename in filenames]
+            )
+            assert contents == [filename.encode() for filename in filenames]
+
+            assert sorted(await store.list_objects("test_async/")) == sorted(
+                filenames
+            )
+
+            df = pd.DataFrame({"a": [1, 2, 3]})
+            await store.put_frame("test_async/frame.parquet", df)
+            df2 = await store.get_frame("test_async/frame.parquet")
+            assert df.equals(df2)
+
+            events = store.watch("test_async/", Event.REMOVED)
+            next_event = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0.5)
+
+            await store.remove_file(filenames[0])
+
+            typ, filename = await asyncio.wait_for(next_event, 10)
+            assert typ == Event.REMOVED
+            assert filename == filenames[0]
+
+            await events.aclose()
+
+            for filename in filenames[1:] + ["test_async/frame.parquet"]:
+                await store.remove_file(filename)
+
+    asyncio.run(run())
+
+
+def test_prefix_trie():
+    trie = PrefixTrie()
+
+    a, b, c = object(), object(), object()
+
+    trie.insert("config/", a)  # type: ignore
+    trie.insert("config/jobs/", b)  # type: ignore
+    trie.insert("data/", c)  # type: ignore
+
+    assert trie.match("config/jobs/test.yaml") == [a, b]
+    assert trie.match("config/acls.yaml") == [a]
+    assert trie.match("data/test") == [c]
+    assert trie.match("other") == []
+
+    assert sorted(trie.prefixes()) == ["config/", "config/jobs/", "data/"]
+
+    trie.remove("config/jobs/", b)  # type: ignore
+
+    assert trie.match("config/jobs/test.yaml") == [a]
+    assert sorted(trie.prefixes()) == ["config/", "data/"]
+
+
+class Notifications:
+    def __init__(self):
+        self.watchers: list[Watcher] = []
+
+    def subscribe(self, watcher: Watcher):
+        self.watchers.append(watcher)
+
+    def unsubscribe(self, watcher: Watcher):
+        self.watchers.remove(watcher)
+
+    def lookup(self, prefix: str) -> None:
+        return None
+
+
+class WatchedClient:
+    def __init__(self, objects: dict[str, ObjectInfo]):
+        self.objects = objects
+        self.listing = Notifications()
+
+    def notifications(self) -> Notifications:
+        return self.listing
+
+    def list_objects(self, prefix: str) -> dict[str, ObjectInfo]:
+        # An object is created while the prefix is listed
+        info = ObjectInfo("etag-new", None, 1)
+        self.objects["test/new"] = info
+        for watcher in self.listing.watchers:
+            watcher._notify(Event.CREATED, "test/new", info)
+
+        return dict(self.objects)
+
+
+def test_watcher_baseline():
+    received: list[tuple[Event, str]] = []
+
+    def callback(s: Client, evt: Event, filename: str):
+        received.append((evt, filename))
+
+    client = WatchedClient({"test/existing": ObjectInfo("etag", None, 1)})
+    watcher = Watcher(client, "test/", callback)  # type: ignore[arg-type]
+
+    # The baseline listing is silent, but events received meanwhile are not
+    assert received == [(Event.CREATED, "test/new")]
+    assert watcher.synced
+    assert watcher.index.names() == ["test/existing", "test/new"]
+
+    # Changes missed while disconnected are reported on reconciliation
+    received.clear()
+    watcher._sync(
+        {
+            "test/new": ObjectInfo("etag-new", None, 1),
+            "test/missed": ObjectInfo("etag", None, 1),
+        }
+    )
+
+    assert len(received) == 2
+    assert set(received) == {
+        (Event.CREATED, "test/missed"),
+        (Event.REMOVED, "test/existing"),
+    }
+
+
+@pytest.mark.store
+def test_watch_shared():
+    store = Client()
+
+    received: dict[str, list[tuple[Event, str]]] = {"a": [], "b": []}
+
+    def callback(name: str, s: Client, evt: Event, filename: str):
+        received[name].append((evt, filename))
+
+    watcher_a = store.watch_async(
+        "test_shared/a/", functools.partial(callback, "a")
+    )
+    watcher_b = store.watch_async(
+        "test_shared/b/", functools.partial(callback, "b"), Event.CREATED
+    )
+
+    # Both watchers share a single stream on the common prefix
+    assert watcher_a._notifications is watcher_b._notifications
+
+    # Wait for the stream to be reopened on the common prefix
+    time.sleep(0.5)
+
+    store.put_file_contents("test_shared/a/1", b"a")
+    store.put_file_contents("test_shared/b/1", b"b")
+    store.remove_file("test_shared/a/1")
+    store.remove_file("test_shared/b/1")
+
+    time.sleep(1)
+
+    watcher_a.stop()
+    watcher_b.stop()
+
+    assert received["a"] == [
+        (Event.CREATED, "test_shared/a/1"),
+        (Event.REMOVED, "test_shared/a/1"),
+    ]
+    assert received["b"] == [(Event.CREATED, "test_shared/b/1")]
+
+
+@pytest.mark.store
+@pytest.mark.parametrize("initial", [True, False])
+def test_watch_reconnect(initial: bool):
+    store = Client()
+
+    received: list[tuple[Event, str]] = []
+
+    def callback(s: Client, evt: Event, filename: str):
+        received.append((evt, filename))
+
+    store.put_file_contents("test_reconnect/existing", b"a")
+
+    # Watchers reconcile missed events whether or not they reported the
+    # existing objects
+    watcher = store.watch_async("test_reconnect/", callback, initial=initial)
+    time.sleep(0.5)
+
+    if initial:
+        assert received == [(Event.CREATED, "test_reconnect/existing")]
+    else:
+        assert received == []
+
+    received.clear()
+
+    # Simulate a dropped connection and modify objects meanwhile
+    stream = watcher._notifications._stream
+    assert stream is not None
+    stream.close()
+
+    store.put_file_contents("test_reconnect/new", b"b")
+    store.remove_file("test_reconnect/existing")
+
+    time.sleep(3)
+
+    watcher.stop()
+    store.remove_file("test_reconnect/new")
+
+    # Each change is reported once, either live or by reconciliation
+    assert len(received) == 2
+    assert set(received) == {
+        (Event.CREATED, "test_reconnect/new"),
+        (Event.REMOVED, "test_reconnect/existing"),
+    }
+
+
+def test_object_index(tmp_path):
+    ts = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    path = tmp_path / "index.json"
+
+    index = ObjectIndex("test/", path, save_interval=0)
+
+    changes = index.sync(
+        {
+            "test/a": ObjectInfo("etag-a", ts, 1),
+            "test/b": ObjectInfo("etag-b", ts, 2),
+        }
+    )
+    assert changes == [(Event.CREATED, "test/a"), (Event.CREATED, "test/b")]
+
+    # Notifications of already indexed versions are ignored
+    assert not index.apply(Event.CREATED, "test/a", ObjectInfo("etag-a", ts))
+    assert index.apply(Event.CREATED, "test/a", ObjectInfo("etag-c", ts))
+    assert not index.apply(Event.REMOVED, "test/unknown", ObjectInfo())
+
+    assert index.names() == ["test/a", "test/b"]
+
+    restored = ObjectIndex("test/", path)
+    assert restored.restored
+    assert restored.get("test/a") == ObjectInfo("etag-c", ts)
+
+    changes = restored.sync({"test/a": ObjectInfo("etag-c", ts)})
+    assert changes == [(Event.REMOVED, "test/b")]
+
+
+def test_content_cache():
+    cache = ContentCache(max_bytes=10)
+
+    cache.put("a", "etag-a", b"aaaa")
+    cache.put("b", "etag-b", b"bbbb")
+
+    # Access "a" so that "b" is the least recently used entry
+    assert cache.get("a") is not None
+
+    cache.put("c", "etag-c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size == 8
+
+    # Objects larger than the cache are not kept
+    entry = cache.put("d", "etag-d", b"d" * 11)
+    assert entry.content == b"d" * 11
+    assert cache.get("d") is None
+
+    cached = cache.get("a")
+    assert cached is not None
+    assert cached.load(len) == 4
+
+
+@pytest.mark.store
+def test_cached_contents():
+    store = Client()
+
+    store.put_file_contents("test_cache/config.yaml", b"a: 1")
+
+    assert store.get_cached_contents("test_cache/config.yaml") == b"a: 1"
+    assert store.cache.misses == 1
+
+    # Unchanged objects are revalidated by their ETag
+    assert store.get_cached_contents("test_cache/config.yaml") == b"a: 1"
+    assert store.cache.hits == 1
+
+    store.put_file_contents("test_cache/config.yaml", b"a: 2")
+
+    assert store.get_cached_contents("test_cache/config.yaml") == b"a: 2"
+    assert store.cache.misses == 2
+
+    store.remove_file("test_cache/config.yaml")
+
+
+def test_renewing_provider():
+    providers: list[minio.credentials.Provider] = []
+
+    def factory():
+        providers.append(
+            minio.credentials.StaticProvider(f"key{len(providers)}", "secret")
+        )
+        return providers[-1]
+
+    provider = RenewingProvider(
+        factory,
+        lifetime=datetime.timedelta(seconds=0.2),
+        refresh_margin=datetime.timedelta(seconds=0.1),
+    )
+
+    creds = provider.retrieve()
+
+    assert creds.access_key == "key0"
+    assert not provider.needs_renewal()
+    assert provider.retrieve() is creds
+
+    time.sleep(0.1)
+
+    assert provider.needs_renewal()
+    assert provider.retrieve().access_key == "key1"
+    assert not provider.needs_renewal()
+
+    with pytest.raises(ValueError):
+        RenewingProvider(
+            factory,
+            lifetime=datetime.timedelta(minutes=5),
+            refresh_margin=datetime.timedelta(minutes=5),
+        )
+
+
+def test_renewing_provider_expiration():
+    expiration = datetime.timedelta(seconds=0.3)
+
+    class Provider(minio.credentials.Provider):
+        def retrieve(self):
+            return ExpiringCredentials(
+                "key",
+                "secret",
+                None,
+                datetime.datetime.now(datetime.timezone.utc) + expiration,
+            )
+
+    # The deadline follows the expiry instead of the requested lifetime
+    provider = RenewingProvider(
+        Provider,
+        lifetime=datetime.timedelta(hours=1),
+        refresh_margin=datetime.timedelta(seconds=0.1),
+    )
+
+    provider.retrieve()
+    assert not provider.needs_renewal()
+
+    time.sleep(0.25)
+    assert provider.needs_renewal()
+
+    # Credentials expiring within the margin are not renewed on every call
+    expiration = datetime.timedelta(seconds=0.05)
+    provider.retrieve()
+    assert not provider.needs_renewal()
+
+
+def test_certificate_provider():
+    class Response:
+        status = 200
+        data = b"""<AssumeRoleWithCertificateResponse
+            xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+          <AssumeRoleWithCertificateResult>
+            <Credentials>
+              <AccessKeyId>key</AccessKeyId>
+              <SecretAccessKey>secret</SecretAccessKey>
+              <SessionToken>token</SessionToken>
+              <Expiration>2099-01-02T03:04:05Z</Expiration>
+            </Credentials>
+          </AssumeRoleWithCertificateResult>
+        </AssumeRoleWithCertificateResponse>"""
+
+    urls: list[str] = []
+
+    class HTTPClient:
+        def request(self, method: str, url: str) -> Response:
+            urls.append(url)
+            return Response()
+
+    provider = CertificateProvider(
+        "https://localhost:9000",
+        HTTPClient(),  # type: ignore[arg-type]
+        datetime.timedelta(hours=1),
+    )
+
+    creds = provider.retrieve()
+
+    assert creds.access_key == "key"
+    assert creds.secret_key == "secret"
+    assert creds.session_token == "token"
+    assert creds.expiration == datetime.datetime(
+        2099, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc
+    )
+
+    # Credentials are retrieved once until they expire
+    assert provider.retrieve() is creds
+    assert len(urls) == 1
+    assert "Action=AssumeRoleWithCertificate" in urls[0]
+    assert "DurationSeconds=3600" in urls[0]